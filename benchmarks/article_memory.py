@@ -0,0 +1,142 @@
+"""Measures the memory per article of the dataframes created while ingesting the corpus.
+
+Articles with the fields of the news corpus are generated in a temporary folder and loaded once
+with every field as Python objects, as before ARTICLE_FIELDS, and once with generate_dataframes,
+keeping only the fields of ARTICLE_FIELDS in their compact dtypes. Type
+
+    $ python benchmarks/article_memory.py --n-articles 5000
+
+to print the memory of both dataframes per article: the memory reported by pandas, which does
+not look inside nested fields, and the memory allocated by Python and Arrow that the dataframe
+keeps alive.
+"""
+import argparse
+import gc
+import json
+import random
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+from sentimentipos.data_management import generate_dataframes, read_article
+from sentimentipos.data_management.data_processing import get_matching_files
+
+SITES = ["reuters.com", "cnbc.com", "wsj.com", "marketwatch.com", "bloomberg.com"]
+WORDS = (
+    "the company shares investors market growth revenue quarter analysts expect strong "
+    "decline loss gain offering price listing stock exchange billion million said"
+).split()
+
+
+def make_article(rng, i):
+    site = rng.choice(SITES)
+    published = pd.Timestamp("2018-01-01") + pd.Timedelta(minutes=rng.randrange(200000))
+    published = published.strftime("%Y-%m-%dT%H:%M:%S.000+00:00")
+    title = f"Company A {' '.join(rng.choices(WORDS, k=8))}"
+    text = " ".join(rng.choices(WORDS, k=rng.randint(150, 600)))
+    return {
+        "uuid": f"{i:040x}",
+        "url": f"https://{site}/article/{i}",
+        "ord_in_thread": 0,
+        "author": rng.choice(["Reuters Staff", "Jane Doe", "John Roe"]),
+        "published": published,
+        "title": title,
+        "text": text,
+        "language": "english",
+        "crawled": published,
+        "highlightText": "",
+        "external_links": [f"https://{site}/related/{i + k}" for k in range(3)],
+        "entities": {
+            "persons": [{"name": "jane doe", "sentiment": "none"}],
+            "organizations": [{"name": "company a", "sentiment": "none"}],
+            "locations": [{"name": "new york", "sentiment": "none"}],
+        },
+        "thread": {
+            "uuid": f"{i:040x}",
+            "url": f"https://{site}/article/{i}",
+            "site_full": f"www.{site}",
+            "site": site,
+            "site_section": f"https://{site}/markets",
+            "section_title": "Markets",
+            "title": title,
+            "published": published,
+            "replies_count": 0,
+            "participants_count": 1,
+            "site_type": "news",
+            "country": "US",
+            "spam_score": 0.0,
+            "main_image": f"https://{site}/images/{i}.jpg",
+            "performance_score": 0,
+            "domain_rank": rng.randrange(1, 1000),
+            "social": {
+                network: {"likes": 0, "shares": rng.randrange(100)}
+                for network in [
+                    "facebook",
+                    "gplus",
+                    "pinterest",
+                    "linkedin",
+                    "stumbledupon",
+                ]
+            },
+        },
+    }
+
+
+def load_and_measure(load):
+    gc.collect()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    df = load()
+    gc.collect()
+    python_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    retained = python_bytes + pa.total_allocated_bytes() - arrow_before
+    return df, {
+        "pandas": df.memory_usage(deep=True).sum() / len(df),
+        "retained": retained / len(df),
+    }
+
+
+def load_all_fields(folder, word):
+    articles = {key: read_article(key) for key in get_matching_files(folder, word)}
+    return pd.DataFrame.from_dict(articles, orient="index")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-articles", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    ipo_info = pd.DataFrame(
+        {"company_name": ["Company A"], "ticker": ["A"], "ipo_date": ["2019-01-01"]},
+        index=["A"],
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        text_bytes = 0
+        for i in range(args.n_articles):
+            article = make_article(rng, i)
+            text_bytes += len(article["text"].encode())
+            with open(Path(folder) / f"news_{i}.json", "w") as f:
+                json.dump(article, f)
+        _, full = load_and_measure(
+            lambda: load_all_fields(folder, "Company A"),
+        )
+        compact_df, compact = load_and_measure(
+            lambda: generate_dataframes(folder, ipo_info)["df_A"],
+        )
+
+    print(
+        f"{args.n_articles} articles, {text_bytes / args.n_articles:,.0f} bytes of text each"
+    )
+    print(f"{'bytes per article':<24}{'pandas':>10}{'retained':>10}")
+    for name, memory in [("all fields as objects", full), ("ARTICLE_FIELDS", compact)]:
+        print(f"{name:<24}{memory['pandas']:>10,.0f}{memory['retained']:>10,.0f}")
+    print(compact_df.dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compares reading the corpus from one JSON file per article and from packed shards.
+
+Articles with the fields of the news corpus are generated in a temporary folder and packed with
+pack_corpus. Type
+
+    $ python benchmarks/corpus_packing.py --n-articles 20000
+
+to print the size on disk of both layouts, the time to stream all articles and the time to
+read articles in random order. Timings on files just written are served from the page cache,
+so they understate the cost of the small files on a cold or networked file system.
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sentimentipos.data_management import open_corpus, pack_corpus
+
+sys.path.insert(0, str(Path(__file__).parent))
+from article_memory import make_article  # noqa: E402
+
+
+def disk_usage(folder):
+    return sum(path.stat().st_blocks * 512 for path in Path(folder).rglob("*"))
+
+
+def time_reads(corpus, keys):
+    start = time.perf_counter()
+    for key in keys:
+        corpus.read(key)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-articles", type=int, default=5000)
+    parser.add_argument("--n-random", type=int, default=1000)
+    parser.add_argument("--block-size", type=int, default=65536)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "unzipped"
+        for i in range(args.n_articles):
+            subfolder = folder / f"part_{i % 10}"
+            subfolder.mkdir(parents=True, exist_ok=True)
+            with open(subfolder / f"news_{i}.json", "w") as f:
+                json.dump(make_article(rng, i), f)
+        start = time.perf_counter()
+        summary = pack_corpus(folder, Path(tmp) / "packed", block_size=args.block_size)
+        pack_time = time.perf_counter() - start
+
+        print(f"{args.n_articles} articles packed in {pack_time:.2f} s")
+        print(f"{'':<10}{'files':>8}{'on disk':>14}{'stream':>10}{'random':>10}")
+        for name in ["unzipped", "packed"]:
+            corpus = open_corpus(Path(tmp) / name)
+            keys = corpus.keys()
+            start = time.perf_counter()
+            for _ in corpus.iter_articles():
+                pass
+            stream = time.perf_counter() - start
+            random_time = time_reads(corpus, rng.sample(keys, args.n_random))
+            n_files = sum(path.is_file() for path in (Path(tmp) / name).rglob("*"))
+            print(
+                f"{name:<10}{n_files:>8}{disk_usage(Path(tmp) / name):>14,}"
+                f"{stream:>9.2f}s{random_time:>9.2f}s",
+            )
+        ratio = summary["raw_bytes"] / summary["packed_bytes"]
+        print(f"compression ratio {ratio:.1f}")
+
+
+if __name__ == "__main__":
+    main()
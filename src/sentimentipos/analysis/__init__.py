@@ -1,5 +1,30 @@
 """Code for the core analyses."""
-from sentimentipos.analysis.model import get_sentiment_scores, run_linear_regression
+from sentimentipos.analysis.cube import (
+    SentimentCube,
+    build_sentiment_cube,
+    ipo_windows,
+    window_sentiment_scores,
+)
+from sentimentipos.analysis.model import (
+    get_scores_from_words,
+    get_scores_from_words_dfs,
+    get_sentiment_scores,
+    get_term_counts,
+    run_linear_regression,
+    scores_from_counts,
+)
 from sentimentipos.data_management.data_processing import ipo_tickers
 
-__all__ = [get_sentiment_scores, ipo_tickers, run_linear_regression]
+__all__ = [
+    SentimentCube,
+    build_sentiment_cube,
+    ipo_windows,
+    window_sentiment_scores,
+    get_scores_from_words,
+    get_scores_from_words_dfs,
+    get_sentiment_scores,
+    get_term_counts,
+    ipo_tickers,
+    run_linear_regression,
+    scores_from_counts,
+]
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+
+from sentimentipos.analysis.model import get_term_counts, scores_from_counts
+from sentimentipos.data_management.data_processing import tokenize_text
+
+CUBE_COLUMNS = ["Positive", "Negative", "Tokens"]
+
+
+def _to_days(dates):
+    dates = pd.DatetimeIndex(pd.to_datetime(dates, errors="coerce", utc=True))
+    return dates.tz_convert(None).normalize()
+
+
+class SentimentCube:
+    """Daily positive, negative and total word counts of every company, stored as cumulative sums
+    along the date axis. The counts of any company over any range of days are the difference of
+    two cumulative sums, so each window is answered in constant time.
+
+    Args:
+        tickers (list): The tickers of the companies, in the order of the first axis.
+        start (pd.Timestamp): The first day of the date axis.
+        cumulative (np.ndarray): Array of shape (tickers, days + 1, 3) whose entry [i, d] holds
+            the counts of company i over the first d days, in the order of CUBE_COLUMNS.
+
+    """
+
+    def __init__(self, tickers, start, cumulative):
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.start = pd.Timestamp(start)
+        self.cumulative = cumulative
+
+    @property
+    def n_days(self):
+        """The number of days covered by the cube."""
+        return self.cumulative.shape[1] - 1
+
+    def _day_positions(self, dates, default):
+        days = _to_days(dates)
+        positions = np.asarray((days - self.start).days, dtype=float)
+        positions = np.where(np.isnan(positions), default, positions)
+        return np.clip(positions, 0, self.n_days).astype(int)
+
+    def window_counts(self, tickers, starts, ends):
+        """Looks up the counts of many windows at once. A window contains the days from its start
+        up to, but excluding, its end, like the articles published before the IPO date.
+
+        Args:
+            tickers (list): The ticker of each window.
+            starts (list): The first day of each window, or None for the whole history.
+            ends (list): The day after the last day of each window, or None for no end.
+
+        Returns:
+            counts (pd.DataFrame): DataFrame with one row per window and the columns Positive,
+            Negative and Tokens.
+
+        """
+        rows = np.array([self.ticker_index[ticker] for ticker in tickers], dtype=int)
+        first = self._day_positions(starts, default=0)
+        last = self._day_positions(ends, default=self.n_days)
+        last = np.maximum(last, first)
+        values = self.cumulative[rows, last] - self.cumulative[rows, first]
+        counts = pd.DataFrame(values, columns=CUBE_COLUMNS)
+        return counts
+
+    def window_scores(self, windows):
+        """Computes the sentiment scores of many windows at once.
+
+        Args:
+            windows (pd.DataFrame): DataFrame with the columns ticker, start and end, one row
+                per window, as returned by ipo_windows.
+
+        Returns:
+            df_scores (pd.DataFrame): The windows with their Positive, Negative, Polarity,
+            Subjectivity and Tokens columns added.
+
+        """
+        counts = self.window_counts(windows["ticker"], windows["start"], windows["end"])
+        counts.index = windows.index
+        df_scores = pd.concat([windows, scores_from_counts(counts)], axis=1)
+        df_scores["Tokens"] = counts["Tokens"]
+        return df_scores
+
+    def save(self, path):
+        """Stores the cube in a NumPy .npz file.
+
+        Args:
+            path (str or pathlib.Path): The path of the file.
+
+        """
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                tickers=np.array(self.tickers, dtype=str),
+                start=np.array(str(self.start.date())),
+                cumulative=self.cumulative,
+            )
+
+    @classmethod
+    def load(cls, path):
+        """Reads a cube stored with save.
+
+        Args:
+            path (str or pathlib.Path): The path of the file.
+
+        Returns:
+            SentimentCube: The stored cube.
+
+        """
+        with np.load(path) as data:
+            return cls(list(data["tickers"]), str(data["start"]), data["cumulative"])
+
+
+def build_sentiment_cube(dfs, lm):
+    """Tokenizes and scores every article once and aggregates the word counts per company and
+    publication day into a SentimentCube. Articles without a valid publication date are left
+    out, as in filter_df_by_ipo_date.
+
+    Args:
+        dfs (dict or iterable): A dictionary associating to each ticker the dataframe of its
+            articles, with the columns published and text, or pairs of a ticker and a chunk
+            of its articles, as yielded by iter_dfs_filtered.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+
+    Returns:
+        cube (SentimentCube): The cube of cumulative daily counts.
+
+    """
+    chunks = dfs.items() if isinstance(dfs, dict) else dfs
+    tickers = []
+    frames = []
+    for ticker, df in chunks:
+        if ticker not in tickers:
+            tickers.append(ticker)
+        articles_words = [tokenize_text(text) for text in df["text"]]
+        counts = get_term_counts(articles_words, lm)
+        counts["ticker"] = ticker
+        counts["day"] = _to_days(df["published"])
+        frames.append(counts)
+    if frames:
+        counts = pd.concat(frames, ignore_index=True).dropna(subset=["day"])
+    if not frames or counts.empty:
+        return SentimentCube(tickers, "1970-01-01", np.zeros((len(tickers), 1, 3)))
+    start = counts["day"].min()
+    days = pd.date_range(start, counts["day"].max(), freq="D")
+    daily = counts.groupby(["ticker", "day"])[CUBE_COLUMNS].sum()
+    daily = daily.reindex(pd.MultiIndex.from_product([tickers, days]), fill_value=0)
+    values = daily.to_numpy(dtype=float).reshape(len(tickers), len(days), 3)
+    cumulative = np.zeros((len(tickers), len(days) + 1, 3))
+    np.cumsum(values, axis=1, out=cumulative[:, 1:])
+    return SentimentCube(tickers, start, cumulative)
+
+
+def ipo_windows(ipo_info, lengths):
+    """Defines pre-IPO windows of several lengths for every company. Each window ends the day
+    before the IPO.
+
+    Args:
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        lengths (list): The lengths of the windows in days, None for the whole history.
+
+    Returns:
+        windows (pd.DataFrame): DataFrame with the columns window, ticker, start and end.
+
+    """
+    ipo_dates = _to_days(ipo_info["ipo_date"])
+    windows = []
+    for length in lengths:
+        name = "all" if length is None else f"{length}d"
+        for ticker, ipo_date in zip(ipo_info["ticker"], ipo_dates):
+            start = None if length is None else ipo_date - pd.Timedelta(days=length)
+            windows.append(
+                {"window": name, "ticker": ticker, "start": start, "end": ipo_date},
+            )
+    return pd.DataFrame(windows, columns=["window", "ticker", "start", "end"])
+
+
+def window_sentiment_scores(cube, ipo_info, lengths):
+    """Computes the sentiment scores of every company for many pre-IPO windows at once, in the
+    shape expected by run_linear_regression.
+
+    Each article is split into words on its own, so the "all" window does not equal the
+    scores of get_sentiment_scores on the words files of the build. The words files count
+    their header as a word, and split_text joins the texts of a company with commas, so the
+    last and first words of neighbouring articles merge into one. The "all" window therefore
+    has one token fewer than the build for the header, one more for every join where two
+    words merge, and it scores the merged words separately.
+
+    Args:
+        cube (SentimentCube): The cube of cumulative daily counts.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        lengths (list): The lengths of the windows in days, None for the whole history.
+
+    Returns:
+        scores (dict): A dictionary associating to each window name ("7d", ..., "all") a
+        DataFrame of sentiment scores indexed by ticker, in the order of ipo_info.
+
+    """
+    df_scores = cube.window_scores(ipo_windows(ipo_info, lengths))
+    scores = {
+        window: group.set_index("ticker")[
+            ["Positive", "Negative", "Polarity", "Subjectivity"]
+        ].rename_axis(None)
+        for window, group in df_scores.groupby("window", sort=False)
+    }
+    return scores
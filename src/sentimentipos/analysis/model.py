@@ -1,27 +1,79 @@
 import pandas as pd
 import statsmodels.api as sm
 
+from sentimentipos.utilities import AdaptiveBatchSize
 
-def get_sentiment_scores(ipo_list, lm, path):
+# Same smoothing constant as pysentiment2, so scores computed from counts match lm.get_score.
+EPSILON = 1e-6
+# The words files of the build are read without a header, so their column name is a word.
+HEADER_WORDS = ["words"]
+
+
+def get_sentiment_scores(ipo_list, lm, path, memory_budget=None):
     """Calculates sentiment scores for each ticker in the IPO list.
 
+    With a memory budget, the words files are read in chunks whose size adapts to the memory
+    of the process, and the positive, negative and total word counts of the chunks are summed
+    with get_term_counts, so that no file is ever held in memory at once.
+
     Args:
         ipo_list (list): A list of ticker symbols.
         lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
         path (str): Directory path containing the words files for each ticker.
+        memory_budget (int or str, optional): The memory budget, e.g. "4G".
 
     Returns:
         df_scores (pd.DataFrame): DataFrame containing sentiment scores for each ticker.
 
     """
-    df_scores = pd.DataFrame(index=ipo_list)
-
+    if memory_budget is not None:
+        return _get_sentiment_scores_chunked(ipo_list, lm, path, memory_budget)
+    words = {}
     for ticker in ipo_list:
         words_file = path / f"{ticker}.csv"
         words_df = pd.read_csv(words_file, header=None)
-        words = list(words_df[0])
+        words[ticker] = list(words_df[0])
+    df_scores = get_scores_from_words(words, lm)
+    return df_scores
+
 
-        score = lm.get_score(words)
+def _get_sentiment_scores_chunked(ipo_list, lm, path, memory_budget):
+    batch_sizes = AdaptiveBatchSize(memory_budget, initial=100000, maximum=10000000)
+    cache = {}
+    counts = pd.DataFrame(
+        0.0,
+        index=ipo_list,
+        columns=["Positive", "Negative", "Tokens"],
+    )
+    for ticker in ipo_list:
+        with pd.read_csv(path / f"{ticker}.csv", header=None, iterator=True) as reader:
+            while True:
+                try:
+                    chunk = reader.get_chunk(batch_sizes.size)
+                except StopIteration:
+                    break
+                chunk_counts = get_term_counts([list(chunk[0])], lm, cache)
+                counts.loc[ticker] += chunk_counts.loc[0, counts.columns]
+                batch_sizes.update()
+    df_scores = scores_from_counts(counts)
+    return df_scores
+
+
+def get_scores_from_words(words, lm):
+    """Calculates sentiment scores for each ticker from its words.
+
+    Args:
+        words (dict): A dictionary associating to each ticker the list of its words.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+
+    Returns:
+        df_scores (pd.DataFrame): DataFrame containing sentiment scores for each ticker.
+
+    """
+    df_scores = pd.DataFrame(index=list(words))
+
+    for ticker, ticker_words in words.items():
+        score = lm.get_score(ticker_words)
 
         df_scores.loc[ticker, "Positive"] = score["Positive"]
         df_scores.loc[ticker, "Negative"] = score["Negative"]
@@ -31,6 +83,93 @@ def get_sentiment_scores(ipo_list, lm, path):
     return df_scores
 
 
+def get_scores_from_words_dfs(words_dfs, lm):
+    """Calculates sentiment scores for each ticker from its words as returned by split_text,
+    with the same results as get_sentiment_scores on the words files written by the build.
+
+    Args:
+        words_dfs (dict): A dictionary associating to each ticker the DataFrame of its words,
+            with a single column named 'words'.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+
+    Returns:
+        df_scores (pd.DataFrame): DataFrame containing sentiment scores for each ticker.
+
+    """
+    words = {
+        ticker: [*HEADER_WORDS, *words_df["words"]]
+        for ticker, words_df in words_dfs.items()
+    }
+    df_scores = get_scores_from_words(words, lm)
+    return df_scores
+
+
+def get_term_counts(articles_words, lm, cache=None):
+    """Counts the positive, negative and total words of many articles at once. Each distinct word
+    is scored by the sentiment analyzer only once, and the counts of all articles are obtained in
+    a single vectorized pass.
+
+    Args:
+        articles_words (list): A list containing, for each article, the list of its words.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        cache (dict, optional): A dictionary associating to each word its (positive, negative)
+            score. It is filled with the words scored in this call, so it can be reused.
+
+    Returns:
+        counts (pd.DataFrame): DataFrame with one row per article and the columns Positive and
+        Negative, of dtype float64, and Tokens, of dtype int64, also when there are no
+        articles.
+
+    """
+    cache = {} if cache is None else cache
+    words = pd.Series(articles_words, dtype=object).explode().dropna()
+    for word in words.unique():
+        if word not in cache:
+            score = lm.get_score([word])
+            cache[word] = (score["Positive"], score["Negative"])
+
+    term_scores = pd.DataFrame(
+        [cache[word] for word in words],
+        index=words.index,
+        columns=["Positive", "Negative"],
+        dtype="float64",
+    )
+    counts = term_scores.groupby(level=0).sum()
+    counts = counts.reindex(range(len(articles_words)), fill_value=0.0)
+    counts["Tokens"] = pd.Series(
+        [len(article_words) for article_words in articles_words],
+        dtype="int64",
+    )
+    return counts
+
+
+def scores_from_counts(counts):
+    """Computes the sentiment scores from positive, negative and total word counts, using the
+    same formulas as the sentiment analyzer. Since counts can be summed, this allows scoring any
+    group of articles without tokenizing them again.
+
+    Args:
+        counts (pd.DataFrame): DataFrame with the columns Positive, Negative and Tokens.
+
+    Returns:
+        df_scores (pd.DataFrame): DataFrame with the columns Positive, Negative, Polarity and
+        Subjectivity, with the same index as counts.
+
+    """
+    positive = counts["Positive"]
+    negative = counts["Negative"]
+    df_scores = pd.DataFrame(index=counts.index)
+    df_scores["Positive"] = positive
+    df_scores["Negative"] = negative
+    df_scores["Polarity"] = (
+        (positive - negative) * 1.0 / ((positive + negative) + EPSILON)
+    )
+    df_scores["Subjectivity"] = (
+        (positive + negative) * 1.0 / (counts["Tokens"] + EPSILON)
+    )
+    return df_scores
+
+
 def run_linear_regression(ipo_info, sentiment_scores):
     """Runs a linear regression model using IPO returns as the dependent variable and sentiment
     polarity scores as the independent variable.
@@ -0,0 +1,179 @@
+import argparse
+from pathlib import Path
+
+import pysentiment2 as ps
+
+from sentimentipos.analysis.model import (
+    get_scores_from_words_dfs,
+    run_linear_regression,
+)
+from sentimentipos.config import BLD, SRC
+from sentimentipos.data_management import (
+    ArticleCorpus,
+    get_ipo_data_clean,
+    get_ipo_info,
+    ipo_tickers,
+    split_text,
+    write_dfs_filtered,
+)
+from sentimentipos.final import regression_figure
+
+# The files of the pytask build that the fused pipeline can write, relative to its out_dir.
+PIPELINE_OUTPUTS = {
+    "ipo_data_clean": Path("data") / "ipo_data_clean.xlsx",
+    "ipo_info": Path("data") / "ipo_info.csv",
+    "dfs_filtered": Path("data") / "dfs_filtered.pkl",
+    "tokenized_texts": Path("data") / "tokenized_texts",
+    "sentiment_scores": Path("models") / "sentiment_scores.csv",
+    "regression_plot": Path("figures") / "regression_plot.png",
+    "summary_table": Path("tables") / "summary_table.tex",
+}
+
+
+def run_fused_pipeline(
+    excel_path,
+    corpus_path,
+    lm=None,
+    ipo_list=None,
+    out_dir=None,
+    outputs=None,
+):
+    """Runs the whole analysis of the pytask build in one process: cleans the IPO data, matches
+    and filters the articles, tokenizes and scores them and fits the regression. Every
+    intermediate result is passed on in memory, and files are only written when asked for.
+
+    The results equal those of the build: the words files of the build are read without a
+    header, so their column name is scored as a word, and the same is done here.
+
+    Args:
+        excel_path (str or pathlib.Path): The path to the Excel file containing the raw IPO data.
+        corpus_path (str or pathlib.Path): The path to the unzipped, partitioned or packed
+            corpus.
+        lm (SentimentIntensityAnalyzer, optional): Instance of a sentiment analyzer. Defaults
+            to the Loughran and McDonald dictionary.
+        ipo_list (list, optional): The tickers of the companies. Defaults to ipo_tickers().
+        out_dir (str or pathlib.Path, optional): If given, the outputs are written under this
+            folder with the same layout as in bld/python.
+        outputs (list, optional): The names of the outputs to write, keys of PIPELINE_OUTPUTS.
+            Defaults to all of them when out_dir is given.
+
+    Returns:
+        results (dict): The cleaned IPO data under "ipo_data_clean", the IPO information under
+        "ipo_info", the filtered articles of each ticker under "dfs_filtered", the words of
+        each ticker under "tokenized_texts", the scores under "sentiment_scores" and the fitted
+        regression under "model".
+
+    """
+    lm = ps.LM() if lm is None else lm
+    ipo_list = ipo_tickers() if ipo_list is None else list(ipo_list)
+
+    ipo_data_clean = get_ipo_data_clean(excel_path)
+    ipo_info = get_ipo_info(ipo_list, ipo_data_clean)
+    corpus = ArticleCorpus(corpus_path).for_companies(ipo_info)
+    dfs = corpus.before_ipo().collect()
+    dfs_filtered = [(dfs[ticker], ticker) for ticker in ipo_list]
+    tokenized_texts = {ticker: split_text(df) for df, ticker in dfs_filtered}
+    sentiment_scores = get_scores_from_words_dfs(tokenized_texts, lm)
+    model = run_linear_regression(
+        ipo_info.reset_index(drop=True),
+        sentiment_scores.reset_index(drop=True),
+    )
+
+    results = {
+        "ipo_data_clean": ipo_data_clean,
+        "ipo_info": ipo_info,
+        "dfs_filtered": dfs_filtered,
+        "tokenized_texts": tokenized_texts,
+        "sentiment_scores": sentiment_scores,
+        "model": model,
+    }
+    if out_dir is not None:
+        write_pipeline_outputs(results, out_dir, outputs)
+    return results
+
+
+def write_pipeline_outputs(results, out_dir, outputs=None):
+    """Writes results of run_fused_pipeline to the files the pytask build produces.
+
+    Args:
+        results (dict): The results of run_fused_pipeline.
+        out_dir (str or pathlib.Path): The folder playing the role of bld/python.
+        outputs (list, optional): The names of the outputs to write, keys of PIPELINE_OUTPUTS.
+            Defaults to all of them.
+
+    """
+    outputs = list(PIPELINE_OUTPUTS) if outputs is None else list(outputs)
+    unknown = [name for name in outputs if name not in PIPELINE_OUTPUTS]
+    if unknown:
+        info = f"Unknown outputs {unknown}, expected some of {list(PIPELINE_OUTPUTS)}."
+        raise ValueError(info)
+    paths = {name: Path(out_dir) / PIPELINE_OUTPUTS[name] for name in outputs}
+    for name, path in paths.items():
+        parent = path if name == "tokenized_texts" else path.parent
+        parent.mkdir(parents=True, exist_ok=True)
+
+    if "ipo_data_clean" in paths:
+        results["ipo_data_clean"].to_excel(paths["ipo_data_clean"], index=False)
+    if "ipo_info" in paths:
+        results["ipo_info"].to_csv(paths["ipo_info"], index=False)
+    if "dfs_filtered" in paths:
+        write_dfs_filtered(
+            ((ticker, df) for df, ticker in results["dfs_filtered"]),
+            [ticker for _, ticker in results["dfs_filtered"]],
+            paths["dfs_filtered"],
+        )
+    if "tokenized_texts" in paths:
+        for ticker, words_df in results["tokenized_texts"].items():
+            words_df.to_csv(paths["tokenized_texts"] / f"{ticker}.csv", index=False)
+    if "sentiment_scores" in paths:
+        results["sentiment_scores"].to_csv(paths["sentiment_scores"])
+    if "regression_plot" in paths:
+        fig = regression_figure(
+            {
+                "ipo_info": results["ipo_info"],
+                "sentiment_scores": results["sentiment_scores"],
+                "model": results["model"],
+            },
+        )
+        fig.savefig(paths["regression_plot"])
+    if "summary_table" in paths:
+        with open(paths["summary_table"], "w") as f:
+            f.write(results["model"].summary().as_latex())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the whole analysis in one process, without intermediate files.",
+    )
+    parser.add_argument("--excel", default=SRC / "data" / "original_ipo_data.xlsx")
+    parser.add_argument(
+        "--corpus",
+        default=BLD / "python" / "data" / "unzipped",
+        help="Folder of the unzipped, partitioned or packed articles.",
+    )
+    parser.add_argument(
+        "--out-dir",
+        default=None,
+        help="Folder to write the outputs to, with the layout of bld/python.",
+    )
+    parser.add_argument(
+        "--outputs",
+        nargs="+",
+        choices=list(PIPELINE_OUTPUTS),
+        default=None,
+        help="Outputs to write. Defaults to all of them when --out-dir is given.",
+    )
+    args = parser.parse_args()
+
+    results = run_fused_pipeline(
+        args.excel,
+        args.corpus,
+        out_dir=args.out_dir,
+        outputs=args.outputs,
+    )
+    print(results["sentiment_scores"].to_string())
+    print(results["model"].summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+import argparse
+import math
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pysentiment2 as ps
+
+from sentimentipos.analysis.model import EPSILON, get_term_counts
+from sentimentipos.config import BLD
+from sentimentipos.data_management.corpus import ArticleCorpus
+from sentimentipos.data_management.data_processing import tokenize_text
+
+
+def stratified_order(published, seed=0, freq="M"):
+    """Orders articles randomly but spread evenly over their publication periods, so that every
+    prefix of the order is approximately a proportionally stratified sample by date.
+
+    Args:
+        published (pd.Series): The publication timestamps of the articles.
+        seed (int): The seed of the random number generator.
+        freq (str): The length of the strata, as a pandas period frequency.
+
+    Returns:
+        order (np.ndarray): The positions of the articles in sampling order.
+
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.to_datetime(published, errors="coerce", utc=True)
+    strata = dates.dt.tz_localize(None).dt.to_period(freq).astype(str).to_numpy()
+    keys = np.empty(len(strata))
+    for stratum in np.unique(strata):
+        positions = np.flatnonzero(strata == stratum)
+        ranks = rng.permutation(len(positions))
+        keys[positions] = (ranks + rng.random(len(positions))) / len(positions)
+    order = np.argsort(keys, kind="stable")
+    return order
+
+
+class RatioEstimate:
+    """Running estimate of a ratio of two totals, sum(y) / sum(x), from a sample of articles
+    drawn without replacement from a population of known size, with a confidence interval
+    based on the usual linearized variance of the ratio estimator.
+
+    Args:
+        population (int): The number of articles in the population.
+
+    """
+
+    def __init__(self, population):
+        self.population = population
+        self.n = 0
+        self.sums = dict.fromkeys(["x", "y", "xx", "yy", "xy"], 0.0)
+
+    def update(self, x, y):
+        """Adds sampled articles to the estimate.
+
+        Args:
+            x (np.ndarray): The denominators of the sampled articles.
+            y (np.ndarray): The numerators of the sampled articles.
+
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.n += len(x)
+        self.sums["x"] += x.sum()
+        self.sums["y"] += y.sum()
+        self.sums["xx"] += (x * x).sum()
+        self.sums["yy"] += (y * y).sum()
+        self.sums["xy"] += (x * y).sum()
+
+    def estimate(self):
+        """Returns the current estimate of the ratio."""
+        return self.sums["y"] / (self.sums["x"] + EPSILON)
+
+    def half_width(self, confidence=0.95):
+        """Returns the half width of the confidence interval of the ratio.
+
+        Args:
+            confidence (float): The confidence level of the interval.
+
+        Returns:
+            float: The half width, infinite while fewer than two articles were sampled.
+
+        """
+        if self.n >= self.population:
+            return 0.0
+        if self.n < 2 or self.sums["x"] == 0:
+            return math.inf
+        ratio = self.estimate()
+        residual_ss = (
+            self.sums["yy"] - 2 * ratio * self.sums["xy"] + ratio**2 * self.sums["xx"]
+        )
+        mean_x = self.sums["x"] / self.n
+        variance = (
+            (1 - self.n / self.population)
+            * max(residual_ss, 0.0)
+            / (self.n - 1)
+            / (self.n * mean_x**2)
+        )
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return z * math.sqrt(variance)
+
+
+def progressive_sentiment(
+    dfs,
+    lm,
+    batch_size=50,
+    confidence=0.95,
+    target_half_width=None,
+    seed=0,
+):
+    """Estimates the Polarity and Subjectivity of each company from a growing random sample of
+    its articles, stratified by publication month. After every round, in which up to batch_size
+    more articles per company are tokenized and scored, the current estimates with their
+    confidence intervals are yielded. Once all articles of a company are scored its estimates
+    equal the scores computed from all its articles. The articles must be matched and loaded
+    first, which reads the whole corpus, so progressive_corpus_sentiment samples the corpus
+    itself instead.
+
+    Args:
+        dfs (dict): A dictionary associating to each ticker the dataframe of its matching
+            articles, with the columns published and text.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        batch_size (int): The number of articles scored per company in each round.
+        confidence (float): The confidence level of the intervals.
+        target_half_width (float, optional): Stop sampling a company once the half widths of
+            both of its intervals are at most this value. By default all articles are scored.
+        seed (int): The seed of the random sampling order.
+
+    Yields:
+        estimates (pd.DataFrame): DataFrame indexed by ticker with the estimates and interval
+        bounds of Polarity and Subjectivity, the number of sampled and total articles, and
+        whether sampling of the company has stopped.
+
+    """
+    orders = {
+        ticker: stratified_order(df["published"], seed) for ticker, df in dfs.items()
+    }
+    polarity = {ticker: RatioEstimate(len(df)) for ticker, df in dfs.items()}
+    subjectivity = {ticker: RatioEstimate(len(df)) for ticker, df in dfs.items()}
+    done = {ticker: len(df) == 0 for ticker, df in dfs.items()}
+    term_cache = {}
+
+    while True:
+        for ticker, df in dfs.items():
+            if done[ticker]:
+                continue
+            start = polarity[ticker].n
+            sample = df.iloc[orders[ticker][start : start + batch_size]]
+            articles_words = [tokenize_text(text) for text in sample["text"]]
+            counts = get_term_counts(articles_words, lm, term_cache)
+            polarity[ticker].update(
+                counts["Positive"] + counts["Negative"],
+                counts["Positive"] - counts["Negative"],
+            )
+            subjectivity[ticker].update(
+                counts["Tokens"],
+                counts["Positive"] + counts["Negative"],
+            )
+            widths = [
+                polarity[ticker].half_width(confidence),
+                subjectivity[ticker].half_width(confidence),
+            ]
+            done[ticker] = polarity[ticker].n >= len(df) or (
+                target_half_width is not None and max(widths) <= target_half_width
+            )
+
+        articles = {ticker: polarity[ticker].n for ticker in dfs}
+        totals = {ticker: len(df) for ticker, df in dfs.items()}
+        yield _estimates(polarity, subjectivity, articles, totals, done, confidence)
+
+        if all(done.values()):
+            return
+
+
+def _estimates(polarity, subjectivity, articles, totals, done, confidence):
+    rows = {}
+    for ticker in polarity:
+        row = {}
+        for name, estimate in [
+            ("Polarity", polarity[ticker]),
+            ("Subjectivity", subjectivity[ticker]),
+        ]:
+            value = estimate.estimate()
+            width = estimate.half_width(confidence)
+            row[name] = value
+            row[f"{name}_lower"] = value - width
+            row[f"{name}_upper"] = value + width
+        row["Articles"] = articles[ticker]
+        row["Total"] = totals[ticker]
+        row["Done"] = done[ticker]
+        rows[ticker] = row
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+def progressive_corpus_sentiment(
+    corpus,
+    lm,
+    batch_size=1000,
+    confidence=0.95,
+    target_half_width=None,
+    seed=0,
+):
+    """Estimates the Polarity and Subjectivity of each company straight from the corpus, while
+    its files are read in a random order with ArticleCorpus.sample. Unlike
+    progressive_sentiment, no article has to be matched and loaded before the first estimate,
+    so the first estimates come after reading batch_size files instead of the whole corpus.
+    Each file read is a sampled unit, with zero counts for a company if it does not mention
+    it. After every batch, the current estimates with their confidence intervals are yielded,
+    and once all files are read they equal the scores computed from all matching articles.
+
+    Args:
+        corpus (ArticleCorpus): The query selecting the articles of each company, e.g.
+            ArticleCorpus(folder_path).for_companies(ipo_info).before_ipo().
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        batch_size (int): The number of files read in each round.
+        confidence (float): The confidence level of the intervals.
+        target_half_width (float, optional): Stop reading files once the half widths of both
+            intervals of every company are at most this value. By default all files are read.
+        seed (int): The seed of the random order of the files.
+
+    Yields:
+        estimates (pd.DataFrame): DataFrame indexed by ticker with the estimates and interval
+        bounds of Polarity and Subjectivity, the number of matching articles found, the
+        estimated total number of matching articles, and whether sampling of the company has
+        stopped.
+
+    """
+    n_files, batches = corpus.sample(batch_size, seed)
+    polarity = {ticker: RatioEstimate(n) for ticker, n in n_files.items()}
+    subjectivity = {ticker: RatioEstimate(n) for ticker, n in n_files.items()}
+    articles = dict.fromkeys(n_files, 0)
+    done = {ticker: n == 0 for ticker, n in n_files.items()}
+    term_cache = {}
+    if all(done.values()):
+        yield _estimates(polarity, subjectivity, articles, articles, done, confidence)
+        return
+
+    for files, dfs in batches:
+        for ticker, df in dfs.items():
+            if done[ticker] or files[ticker] == 0:
+                continue
+            articles_words = [tokenize_text(text) for text in df["text"]]
+            counts = get_term_counts(articles_words, lm, term_cache)
+            unmatched = np.zeros(files[ticker] - len(df))
+            articles[ticker] += len(df)
+            polarity[ticker].update(
+                np.concatenate([counts["Positive"] + counts["Negative"], unmatched]),
+                np.concatenate([counts["Positive"] - counts["Negative"], unmatched]),
+            )
+            subjectivity[ticker].update(
+                np.concatenate([counts["Tokens"], unmatched]),
+                np.concatenate([counts["Positive"] + counts["Negative"], unmatched]),
+            )
+            widths = [
+                polarity[ticker].half_width(confidence),
+                subjectivity[ticker].half_width(confidence),
+            ]
+            done[ticker] = polarity[ticker].n >= n_files[ticker] or (
+                target_half_width is not None and max(widths) <= target_half_width
+            )
+
+        totals = {
+            ticker: round(
+                articles[ticker] * n_files[ticker] / max(polarity[ticker].n, 1)
+            )
+            for ticker in n_files
+        }
+        yield _estimates(polarity, subjectivity, articles, totals, done, confidence)
+
+        if all(done.values()):
+            return
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print progressive sentiment estimates while the corpus is sampled.",
+    )
+    parser.add_argument("--corpus", default=BLD / "python" / "data" / "packed")
+    parser.add_argument(
+        "--ipo-info",
+        default=BLD / "python" / "data" / "ipo_info.csv",
+        help="CSV file with the IPO information produced by the build.",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--target-half-width", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ipo_info = pd.read_csv(args.ipo_info)
+    corpus = ArticleCorpus(args.corpus).for_companies(ipo_info).before_ipo()
+    estimates = progressive_corpus_sentiment(
+        corpus,
+        ps.LM(),
+        args.batch_size,
+        args.confidence,
+        args.target_half_width,
+        args.seed,
+    )
+    for i, snapshot in enumerate(estimates):
+        print(f"round {i + 1}")
+        print(snapshot.to_string(), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import statsmodels.api as sm
+
+
+class RecursiveLeastSquares:
+    """Ordinary least squares fit that is updated one observation at a time. Adding or removing an
+    observation updates the coefficients, the inverse of X'X and the sum of squared residuals with
+    the Sherman-Morrison formula in O(k^2), instead of refitting on the whole sample. Until the
+    sample determines all k coefficients, only the cross products are accumulated.
+
+    Args:
+        n_params (int): The number of regressors k, including the constant.
+
+    """
+
+    def __init__(self, n_params):
+        self.n_params = n_params
+        self.n_obs = 0
+        self.xtx = np.zeros((n_params, n_params))
+        self.xty = np.zeros(n_params)
+        self.yty = 0.0
+        self.inverse = None
+        self.params = np.full(n_params, np.nan)
+        self.ssr = np.nan
+
+    def _initialize(self):
+        if (
+            self.n_obs < self.n_params
+            or np.linalg.matrix_rank(self.xtx) < self.n_params
+        ):
+            self.inverse = None
+            self.params = np.full(self.n_params, np.nan)
+            self.ssr = np.nan
+            return
+        self.inverse = np.linalg.inv(self.xtx)
+        self.params = self.inverse @ self.xty
+        self.ssr = max(self.yty - self.params @ self.xty, 0.0)
+
+    def _accumulate(self, x, y, sign):
+        self.n_obs += sign
+        self.xtx += sign * np.outer(x, x)
+        self.xty += sign * x * y
+        self.yty += sign * y * y
+
+    def update(self, x, y):
+        """Adds an observation to the sample.
+
+        Args:
+            x (np.ndarray): The regressors of the observation.
+            y (float): The dependent variable of the observation.
+
+        """
+        x = np.asarray(x, dtype=float)
+        self._accumulate(x, y, +1)
+        if self.inverse is None:
+            self._initialize()
+            return
+        px = self.inverse @ x
+        leverage = x @ px
+        error = y - x @ self.params
+        self.inverse -= np.outer(px, px) / (1 + leverage)
+        self.params = self.params + self.inverse @ x * error
+        self.ssr += error**2 / (1 + leverage)
+
+    def downdate(self, x, y):
+        """Removes an observation that was added before, e.g. when it leaves a rolling window.
+
+        Args:
+            x (np.ndarray): The regressors of the observation.
+            y (float): The dependent variable of the observation.
+
+        """
+        x = np.asarray(x, dtype=float)
+        self._accumulate(x, y, -1)
+        if self.inverse is None:
+            return
+        px = self.inverse @ x
+        leverage = x @ px
+        if self.n_obs < self.n_params or np.isclose(leverage, 1):
+            self._initialize()
+            return
+        error = y - x @ self.params
+        self.inverse += np.outer(px, px) / (1 - leverage)
+        self.params = self.params - self.inverse @ x * error
+        self.ssr = max(self.ssr - error**2 / (1 - leverage), 0.0)
+
+    def cov_params(self):
+        """Returns the covariance matrix of the coefficients, as computed by statsmodels for a
+        non-robust OLS fit.
+
+        Returns:
+            np.ndarray: The k by k covariance matrix, NaN while it is not identified.
+
+        """
+        df_resid = self.n_obs - self.n_params
+        if self.inverse is None or df_resid <= 0:
+            return np.full((self.n_params, self.n_params), np.nan)
+        return self.ssr / df_resid * self.inverse
+
+
+def coefficient_path(X, y, window=None):
+    """Computes the coefficients of the regression of y on X for every expanding or rolling sample
+    of observations in one pass.
+
+    Args:
+        X (pd.DataFrame): The regressors, including the constant, one row per observation in
+            the order in which they arrive.
+        y (pd.Series): The dependent variable.
+        window (int, optional): The number of most recent observations in each rolling sample.
+            By default the samples are expanding.
+
+    Returns:
+        path (pd.DataFrame): DataFrame with the index of X whose row t holds the coefficients,
+        their standard errors (columns ending in "_se") and the number of observations of the
+        sample ending with observation t.
+
+    """
+    names = list(X.columns)
+    values = X.to_numpy(dtype=float)
+    targets = y.to_numpy(dtype=float)
+    rls = RecursiveLeastSquares(len(names))
+    rows = []
+    for t in range(len(values)):
+        rls.update(values[t], targets[t])
+        if window is not None and t >= window:
+            rls.downdate(values[t - window], targets[t - window])
+        bse = np.sqrt(np.diag(rls.cov_params()))
+        rows.append([*rls.params, *bse, rls.n_obs])
+    columns = [*names, *[f"{name}_se" for name in names], "n_obs"]
+    path = pd.DataFrame(rows, index=X.index, columns=columns)
+    return path
+
+
+def regression_path(ipo_info, sentiment_scores, window=None):
+    """Tracks the regression of run_linear_regression as the IPOs list one after the other, over
+    expanding or rolling cohorts.
+
+    Args:
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        sentiment_scores (pd.DataFrame): DataFrame containing sentiment polarity scores, in the
+            same order as ipo_info.
+        window (int, optional): The number of most recent IPOs in each rolling cohort. By
+            default the cohorts are expanding.
+
+    Returns:
+        path (pd.DataFrame): The coefficient path as returned by coefficient_path, indexed by
+        ticker in the order of the IPO dates.
+
+    """
+    data = pd.DataFrame(
+        {
+            "ticker": ipo_info["ticker"].to_numpy(),
+            "ipo_date": pd.to_datetime(ipo_info["ipo_date"]).to_numpy(),
+            "returns": ipo_info["returns"].to_numpy(),
+            "Polarity": sentiment_scores["Polarity"].to_numpy(),
+        },
+    )
+    data = data.sort_values("ipo_date", kind="stable").set_index("ticker")
+    X = sm.add_constant(data["Polarity"], has_constant="add")
+    path = coefficient_path(X, data["returns"], window)
+    return path
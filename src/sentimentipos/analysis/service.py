@@ -0,0 +1,356 @@
+import argparse
+import json
+import queue
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pysentiment2 as ps
+
+from sentimentipos.analysis.model import get_term_counts, scores_from_counts
+from sentimentipos.config import BLD
+from sentimentipos.data_management.data_processing import (
+    matching_tickers,
+    tokenize_text,
+)
+
+SCORE_COLUMNS = ["Positive", "Negative", "Polarity", "Subjectivity"]
+TEXT_FIELDS = ["title", "content", "text"]
+
+
+def validate_articles(articles):
+    """Checks that the articles of a request can be scored before they are queued, so that a
+    malformed article never reaches a micro-batch shared with other requests. Raises a
+    ValueError if an article is not a JSON object or one of its TEXT_FIELDS is not a string.
+
+    Args:
+        articles (list): The parsed JSON articles.
+
+    """
+    for i, article in enumerate(articles):
+        if not isinstance(article, dict):
+            info = f"Article {i} is not a JSON object."
+            raise ValueError(info)
+        for field in TEXT_FIELDS:
+            value = article.get(field)
+            if value is not None and not isinstance(value, str):
+                info = f"The field {field!r} of article {i} must be a string."
+                raise ValueError(info)
+
+
+class MicroBatcher:
+    """Groups concurrent scoring requests into micro-batches. Requests submitted while a batch is
+    being collected are scored together with a single call of the scoring function, and each
+    request receives back only the results of its own articles.
+
+    Args:
+        score_batch (callable): Function taking a list of articles and returning a list with
+            one result per article.
+        max_batch_size (int): The maximum number of articles scored in one batch.
+        max_wait (float): The maximum number of seconds to wait for more requests after the
+            first request of a batch has arrived.
+
+    """
+
+    def __init__(self, score_batch, max_batch_size=256, max_wait=0.005):
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._requests = queue.Queue()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Starts the thread collecting and scoring the batches."""
+        self._worker.start()
+
+    def stop(self):
+        """Stops the batching thread once the pending requests have been scored."""
+        self._stopped.set()
+        self._worker.join()
+
+    def submit(self, articles):
+        """Queues a list of articles for scoring.
+
+        Args:
+            articles (list): The parsed JSON articles to score.
+
+        Returns:
+            future (concurrent.futures.Future): A future resolving to the list of results of the
+            submitted articles.
+
+        """
+        future = Future()
+        self._requests.put((articles, future))
+        return future
+
+    def _collect_batch(self):
+        try:
+            batch = [self._requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        n_articles = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while n_articles < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            n_articles += len(request[0])
+        return batch
+
+    def _run(self):
+        while not (self._stopped.is_set() and self._requests.empty()):
+            batch = self._collect_batch()
+            if not batch:
+                continue
+            articles = [article for request, _future in batch for article in request]
+            try:
+                results = self.score_batch(articles)
+            except Exception:  # noqa: BLE001
+                for request, future in batch:
+                    self._score_alone(request, future)
+                continue
+            start = 0
+            for request, future in batch:
+                future.set_result(results[start : start + len(request)])
+                start += len(request)
+
+    def _score_alone(self, request, future):
+        # A failed batch is scored again request by request, so that the error only reaches
+        # the request that caused it.
+        try:
+            future.set_result(self.score_batch(request))
+        except Exception as error:  # noqa: BLE001
+            future.set_exception(error)
+
+
+class ScoringService:
+    """Keeps the sentiment analyzer, the company matcher and the IPO information in memory, and
+    scores articles in micro-batches.
+
+    Args:
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        max_batch_size (int): The maximum number of articles scored in one batch.
+        max_wait (float): The maximum number of seconds a request waits for others to join its
+            batch.
+
+    """
+
+    def __init__(self, lm, ipo_info, max_batch_size=256, max_wait=0.005):
+        self.lm = lm
+        self.ipo_info = ipo_info.set_index("ticker", drop=False)
+        self.companies = dict(
+            zip(self.ipo_info["ticker"], self.ipo_info["company_name"]),
+        )
+        self._term_cache = {}
+        self.batcher = MicroBatcher(self.score_articles, max_batch_size, max_wait)
+
+    def start(self):
+        """Starts scoring submitted requests."""
+        self.batcher.start()
+
+    def stop(self):
+        """Stops scoring once the pending requests have been answered."""
+        self.batcher.stop()
+
+    def score_articles(self, articles):
+        """Scores a batch of articles with one vectorized pass.
+
+        Args:
+            articles (list): The parsed JSON articles.
+
+        Returns:
+            results (list): For each article, a dictionary with the tickers it mentions, its word
+            counts and its sentiment scores.
+
+        """
+        articles_words = [
+            tokenize_text(article.get("text") or "") for article in articles
+        ]
+        counts = get_term_counts(articles_words, self.lm, self._term_cache)
+        scores = scores_from_counts(counts)
+        results = []
+        for i, article in enumerate(articles):
+            result = {"tickers": matching_tickers(article, self.companies)}
+            result["Tokens"] = int(counts.loc[i, "Tokens"])
+            for column in SCORE_COLUMNS:
+                result[column] = float(scores.loc[i, column])
+            results.append(result)
+        return results
+
+    def score(self, articles):
+        """Scores the articles of one request and aggregates them per ticker. Malformed articles
+        are rejected with validate_articles.
+
+        Args:
+            articles (list): The parsed JSON articles.
+
+        Returns:
+            response (dict): The results of each article under "articles", and under "tickers"
+            the sentiment scores of all the articles mentioning each company.
+
+        """
+        validate_articles(articles)
+        results = self.batcher.submit(articles).result()
+        counts = pd.DataFrame(
+            [
+                {
+                    "ticker": ticker,
+                    "Positive": result["Positive"],
+                    "Negative": result["Negative"],
+                    "Tokens": result["Tokens"],
+                }
+                for result in results
+                for ticker in result["tickers"]
+            ],
+            columns=["ticker", "Positive", "Negative", "Tokens"],
+        ).astype({"Positive": "float64", "Negative": "float64", "Tokens": "int64"})
+        counts = counts.groupby("ticker").sum()
+        ticker_scores = scores_from_counts(counts)
+        tickers = {}
+        for ticker, row in ticker_scores.iterrows():
+            tickers[ticker] = {column: float(row[column]) for column in SCORE_COLUMNS}
+            tickers[ticker]["articles"] = sum(ticker in r["tickers"] for r in results)
+            tickers[ticker]["company_name"] = self.companies[ticker]
+            tickers[ticker]["ipo_date"] = str(self.ipo_info.loc[ticker, "ipo_date"])
+        response = {"articles": results, "tickers": tickers}
+        return response
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """Answers POST /score with the scores of the articles in the request body, which is either
+    a single article, a list of articles or an object with the list under "articles".
+    """
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        self._send_json(
+            {"status": "ok", "tickers": list(self.server.service.companies)}
+        )
+
+    def do_POST(self):
+        if self.path != "/score":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            self._send_json({"error": "The request body is not valid JSON."}, 400)
+            return
+        if isinstance(body, dict):
+            body = body.get("articles", [body])
+        if not isinstance(body, list):
+            info = "The request body must contain JSON articles."
+            self._send_json({"error": info}, 400)
+            return
+        try:
+            response = self.server.service.score(body)
+        except ValueError as error:
+            self._send_json({"error": str(error)}, 400)
+            return
+        except Exception as error:  # noqa: BLE001
+            self._send_json(
+                {"error": f"The articles could not be scored: {error}"}, 500
+            )
+            return
+        self._send_json(response)
+
+    def _send_json(self, data, status=200):
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+
+def make_server(service, host="127.0.0.1", port=8000):
+    """Creates the HTTP server answering scoring requests with the given service. Every
+    connection is handled in its own thread, so that concurrent requests end up in the same
+    micro-batch.
+
+    Args:
+        service (ScoringService): The started scoring service.
+        host (str): The address to listen on.
+        port (int): The port to listen on, 0 to pick a free one.
+
+    Returns:
+        server (ThreadingHTTPServer): The server, not yet serving.
+
+    """
+    server = ThreadingHTTPServer((host, port), ScoringRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def score_remote(url, articles, timeout=30):
+    """Sends articles to a running scoring service.
+
+    Args:
+        url (str): The base URL of the service, e.g. http://127.0.0.1:8000.
+        articles (list): The parsed JSON articles to score.
+        timeout (float): The number of seconds to wait for the answer.
+
+    Returns:
+        response (dict): The per-article and per-ticker scores returned by the service.
+
+    """
+    request = urllib.request.Request(
+        f"{url}/score",
+        data=json.dumps({"articles": articles}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as answer:
+        response = json.load(answer)
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve sentiment scores over HTTP.")
+    parser.add_argument(
+        "--ipo-info",
+        default=BLD / "python" / "data" / "ipo_info.csv",
+        help="CSV file with the IPO information produced by the build.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait", type=float, default=0.005)
+    args = parser.parse_args()
+
+    service = ScoringService(
+        ps.LM(),
+        pd.read_csv(args.ipo_info),
+        args.max_batch_size,
+        args.max_wait,
+    )
+    service.start()
+    server = make_server(service, args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import argparse
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+import pysentiment2 as ps
+
+from sentimentipos.analysis.model import (
+    HEADER_WORDS,
+    get_term_counts,
+    scores_from_counts,
+)
+from sentimentipos.data_management.data_processing import (
+    PUNCTUATION_TABLE,
+    matching_tickers,
+    open_corpus,
+    published_date,
+    read_manifest,
+    split_text,
+)
+
+COUNT_COLUMNS = ["Positive", "Negative", "Tokens", "Articles"]
+SCORE_COLUMNS = ["Positive", "Negative", "Polarity", "Subjectivity"]
+ARTICLE_COLUMNS = ["file", "ticker", "published", "Positive", "Negative", "Tokens"]
+
+
+def shard_files(folder_path, n_shards, shard_id, by="hash"):
+    """Lists the files of the corpus that belong to one shard. Every node computes the same
+    assignment from the relative paths of the files alone, so no coordination is needed.
+
+    Args:
+        folder_path (str): The path to the unzipped or packed corpus.
+        n_shards (int): The total number of shards.
+        shard_id (int): The shard to list, between 0 and n_shards - 1.
+        by (str): "hash" to assign files by a hash of their path, "range" to assign contiguous
+            ranges of the sorted file list.
+
+    Returns:
+        files (list): The paths of the files of the shard.
+
+    """
+    folder = Path(folder_path)
+    files = sorted(
+        Path(key).relative_to(folder).as_posix() for key in open_corpus(folder).keys()
+    )
+    if by == "hash":
+        files = [
+            file for file in files if zlib.crc32(file.encode()) % n_shards == shard_id
+        ]
+    elif by == "range":
+        start = len(files) * shard_id // n_shards
+        stop = len(files) * (shard_id + 1) // n_shards
+        files = files[start:stop]
+    else:
+        info = f"by must be 'hash' or 'range', got {by!r}."
+        raise ValueError(info)
+    return [str(folder / file) for file in files]
+
+
+def corpus_order(folder_path):
+    """Numbers the articles of the corpus in the order in which the build reads them, partition
+    by partition for a partitioned corpus.
+
+    Args:
+        folder_path (str): The path to the unzipped, partitioned or packed corpus.
+
+    Returns:
+        order (dict): The position of every article, by key.
+
+    """
+    folder = Path(folder_path)
+    manifest = read_manifest(folder)
+    if manifest is None:
+        keys = open_corpus(folder).keys()
+    else:
+        keys = [
+            key
+            for partition in manifest["partitions"]
+            for key in open_corpus(folder / partition["name"]).keys()
+        ]
+    return {key: position for position, key in enumerate(keys)}
+
+
+def boundary_text(text):
+    """Keeps the part of an article that split_text can join with its neighbours. split_text
+    joins the texts of a company with commas before splitting them into words, so a first or
+    last word that is not separated from the edge of the text by whitespace merges with the
+    neighbouring article. Splitting the boundary texts of all articles with split_text gives
+    the words that differ from splitting each article on its own.
+
+    Args:
+        text (str): The text of the article, without punctuation.
+
+    Returns:
+        boundary (str): The first and last words if they touch the edges of the text, separated
+        by a space, or the whole text if it contains no whitespace.
+
+    """
+    words = text.split()
+    if words in ([], [text]):
+        return text
+    head = words[0] if not text[0].isspace() else ""
+    tail = words[-1] if not text[-1].isspace() else ""
+    return f"{head} {tail}"
+
+
+def map_shard(folder_path, ipo_info, lm, n_shards=1, shard_id=0, by="hash"):
+    """Matches, filters, tokenizes and scores the articles of one shard. Only the compact
+    per-ticker word counts and the article-level scores leave the shard, together with the
+    position and the boundary text of every article, from which reduce_shards restores the
+    words the build splits across articles.
+
+    Args:
+        folder_path (str): The path to the unzipped, partitioned or packed corpus.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        n_shards (int): The total number of shards.
+        shard_id (int): The shard to process.
+        by (str): How files are assigned to shards, see shard_files.
+
+    Returns:
+        partial (dict): The per-ticker counts under "ticker_counts" and the article-level
+        counts under "article_counts".
+
+    """
+    companies = dict(zip(ipo_info["ticker"], ipo_info["company_name"]))
+    ipo_dates = pd.to_datetime(ipo_info["ipo_date"], errors="coerce", utc=True).dt.date
+    ipo_dates = dict(zip(ipo_info["ticker"], ipo_dates))
+
+    corpus = open_corpus(folder_path)
+    order = corpus_order(folder_path)
+    rows = []
+    articles_words = []
+    for file_path in shard_files(folder_path, n_shards, shard_id, by):
+        data = corpus.read(file_path)
+        if data is None or file_path not in order:
+            continue
+        date = published_date(data.get("published"))
+        if date is None:
+            continue
+        tickers = [
+            ticker
+            for ticker in matching_tickers(data, companies)
+            if date < ipo_dates[ticker]
+        ]
+        if not tickers:
+            continue
+        text = data.get("text")
+        text = text.translate(PUNCTUATION_TABLE) if isinstance(text, str) else ""
+        articles_words.append(text.split())
+        article = len(articles_words) - 1
+        boundary = boundary_text(text)
+        rows += [
+            (file_path, ticker, date, order[file_path], boundary, article)
+            for ticker in tickers
+        ]
+
+    counts = get_term_counts(articles_words, lm)
+    article_counts = pd.DataFrame(
+        rows,
+        columns=["file", "ticker", "published", "order", "boundary", "article"],
+    )
+    article_counts = article_counts.join(counts, on="article").drop(columns="article")
+    counted = article_counts.groupby("ticker")[["Positive", "Negative", "Tokens"]]
+    ticker_counts = counted.sum()
+    ticker_counts["Articles"] = article_counts.groupby("ticker").size()
+    partial = {
+        "ticker_counts": ticker_counts.reindex(columns=COUNT_COLUMNS),
+        "article_counts": article_counts.reindex(
+            columns=[*ARTICLE_COLUMNS, "order", "boundary"],
+        ),
+    }
+    return partial
+
+
+def reduce_shards(partials, ipo_info, lm):
+    """Combines the results of all shards into the sentiment scores expected by
+    run_linear_regression, in the order of the tickers in ipo_info. The scores are those of
+    the build: the words split across articles are restored from the boundary texts of the
+    articles of each ticker in the order of the corpus, and the header of its words file is
+    counted as a word.
+
+    Args:
+        partials (list): The results of map_shard for every shard.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+
+    Returns:
+        sentiment_scores (pd.DataFrame): DataFrame containing sentiment scores for each ticker.
+        article_scores (pd.DataFrame): DataFrame with the counts and sentiment scores of each
+            pair of article and ticker.
+
+    """
+    columns = ["Positive", "Negative", "Tokens"]
+    ticker_counts = pd.concat([partial["ticker_counts"] for partial in partials])
+    ticker_counts = ticker_counts.groupby(level=0).sum()
+    ticker_counts = ticker_counts.reindex(ipo_info["ticker"], fill_value=0.0)
+
+    article_counts = pd.concat(
+        [partial["article_counts"] for partial in partials],
+        ignore_index=True,
+    )
+    cache = {}
+    article_counts = article_counts.sort_values(["ticker", "order"], ignore_index=True)
+    boundaries = article_counts.groupby("ticker")["boundary"]
+    for ticker in ticker_counts.index:
+        texts = boundaries.get_group(ticker) if ticker in boundaries.groups else []
+        joined = list(split_text(pd.DataFrame({"text": texts}))["words"])
+        separate = [text.split() for text in texts]
+        added = get_term_counts([HEADER_WORDS + joined], lm, cache)
+        removed = get_term_counts(separate, lm, cache)
+        ticker_counts.loc[ticker, columns] += (
+            added[columns].sum() - removed[columns].sum()
+        )
+    sentiment_scores = scores_from_counts(ticker_counts)[SCORE_COLUMNS]
+    sentiment_scores.index.name = None
+
+    article_counts = article_counts.sort_values(["ticker", "file"], ignore_index=True)
+    article_scores = scores_from_counts(article_counts)
+    article_scores.insert(0, "file", article_counts["file"])
+    article_scores.insert(1, "ticker", article_counts["ticker"])
+    article_scores.insert(2, "published", article_counts["published"])
+    article_scores["Tokens"] = article_counts["Tokens"]
+    return sentiment_scores, article_scores
+
+
+def _map_shard_job(job):
+    return map_shard(*job)
+
+
+def run_sharded(folder_path, ipo_info, lm, n_shards=4, by="hash", n_workers=None):
+    """Runs the map and reduce steps with a local pool of processes standing in for the worker
+    nodes of a cluster.
+
+    Args:
+        folder_path (str): The path to the unzipped corpus.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        n_shards (int): The number of shards.
+        by (str): How files are assigned to shards, see shard_files.
+        n_workers (int, optional): The number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        sentiment_scores (pd.DataFrame): DataFrame containing sentiment scores for each ticker.
+        article_scores (pd.DataFrame): DataFrame with the counts and sentiment scores of each
+            pair of article and ticker.
+
+    """
+    jobs = [
+        (folder_path, ipo_info, lm, n_shards, shard_id, by)
+        for shard_id in range(n_shards)
+    ]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        partials = list(executor.map(_map_shard_job, jobs))
+    return reduce_shards(partials, ipo_info, lm)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score the corpus in shards on several nodes and combine the results.",
+    )
+    subparsers = parser.add_subparsers(dest="step", required=True)
+    map_parser = subparsers.add_parser("map", help="Process one shard of the corpus.")
+    map_parser.add_argument("--corpus", required=True)
+    map_parser.add_argument("--ipo-info", required=True)
+    map_parser.add_argument("--n-shards", type=int, required=True)
+    map_parser.add_argument("--shard-id", type=int, required=True)
+    map_parser.add_argument("--by", choices=["hash", "range"], default="hash")
+    map_parser.add_argument("--out", required=True, help="Pickle file for the result.")
+    reduce_parser = subparsers.add_parser("reduce", help="Combine the shard results.")
+    reduce_parser.add_argument("partials", nargs="+")
+    reduce_parser.add_argument("--ipo-info", required=True)
+    reduce_parser.add_argument("--out", required=True, help="CSV file for the scores.")
+    reduce_parser.add_argument("--articles-out", default=None)
+    args = parser.parse_args()
+
+    ipo_info = pd.read_csv(args.ipo_info)
+    if args.step == "map":
+        partial = map_shard(
+            args.corpus,
+            ipo_info,
+            ps.LM(),
+            args.n_shards,
+            args.shard_id,
+            args.by,
+        )
+        with open(args.out, "wb") as f:
+            pickle.dump(partial, f)
+    else:
+        partials = [pd.read_pickle(path) for path in args.partials]
+        sentiment_scores, article_scores = reduce_shards(partials, ipo_info, ps.LM())
+        sentiment_scores.to_csv(args.out)
+        if args.articles_out is not None:
+            article_scores.to_csv(args.articles_out, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pysentiment2 as ps
+
+from sentimentipos.analysis.model import scores_from_counts
+from sentimentipos.config import BLD
+from sentimentipos.data_management.data_processing import (
+    matching_tickers,
+    published_date,
+    read_article,
+    tokenize_text,
+)
+
+COUNT_COLUMNS = ["Positive", "Negative", "Tokens", "Articles"]
+
+
+class RollingSentiment:
+    """Keeps running word counts for each tracked company and updates them one article at a time.
+    Only articles published before the IPO date of a company count towards its scores, as in the
+    batch pipeline. The cost of an update depends only on the size of the article, not on the
+    number of articles seen before.
+
+    Args:
+        lm (SentimentIntensityAnalyzer): Instance of a sentiment analyzer.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker,
+            the IPO date and the first day returns of each company in the ipo_list.
+
+    """
+
+    def __init__(self, lm, ipo_info):
+        self.lm = lm
+        self.companies = dict(zip(ipo_info["ticker"], ipo_info["company_name"]))
+        ipo_dates = pd.to_datetime(ipo_info["ipo_date"], errors="coerce", utc=True)
+        self.ipo_dates = dict(zip(ipo_info["ticker"], ipo_dates.dt.date))
+        self.counts = {
+            ticker: dict.fromkeys(COUNT_COLUMNS, 0) for ticker in self.companies
+        }
+        self.n_articles = 0
+        self.processed = set()
+
+    def update(self, article):
+        """Matches an article against the tracked companies and adds its word counts to the
+        companies it mentions before their IPO.
+
+        Args:
+            article (dict): The parsed JSON article.
+
+        Returns:
+            tickers (list): The tickers whose counts were updated.
+
+        """
+        self.n_articles += 1
+        date = published_date(article.get("published"))
+        if date is None:
+            return []
+        tickers = [
+            ticker
+            for ticker in matching_tickers(article, self.companies)
+            if date < self.ipo_dates[ticker]
+        ]
+        if not tickers:
+            return []
+        words = tokenize_text(article.get("text") or "")
+        score = self.lm.get_score(words)
+        for ticker in tickers:
+            counts = self.counts[ticker]
+            counts["Positive"] += score["Positive"]
+            counts["Negative"] += score["Negative"]
+            counts["Tokens"] += len(words)
+            counts["Articles"] += 1
+        return tickers
+
+    def scores(self):
+        """Computes the current sentiment scores of every tracked company.
+
+        Returns:
+            df_scores (pd.DataFrame): DataFrame indexed by ticker with the running counts and the
+            Positive, Negative, Polarity and Subjectivity scores.
+
+        """
+        counts = pd.DataFrame.from_dict(
+            self.counts, orient="index", columns=COUNT_COLUMNS
+        )
+        df_scores = scores_from_counts(counts)
+        df_scores["Tokens"] = counts["Tokens"]
+        df_scores["Articles"] = counts["Articles"]
+        return df_scores
+
+    def snapshot(self, path):
+        """Writes the current scores to a CSV file, next to a JSON file with the running counts
+        and the names of the files counted since they were last moved out of the inbox. Both
+        files are replaced atomically, the JSON file first, so readers never see a partially
+        written snapshot and a restored tracker never counts a file twice.
+
+        Args:
+            path (str or pathlib.Path): The path of the CSV file.
+
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {
+            "counts": self.counts,
+            "n_articles": self.n_articles,
+            "processed": sorted(self.processed),
+        }
+        state_path = _state_path(path)
+        tmp_path = state_path.with_name(f".{state_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        self.scores().to_csv(tmp_path)
+        os.replace(tmp_path, path)
+
+    def restore(self, path):
+        """Resumes from a snapshot written by snapshot. Snapshots without the JSON file of the
+        running counts are restored from the counts in the CSV file.
+
+        Args:
+            path (str or pathlib.Path): The path of the CSV file.
+
+        """
+        state_path = _state_path(path)
+        if state_path.exists():
+            with open(state_path) as f:
+                state = json.load(f)
+            counts = state["counts"]
+            self.n_articles = state["n_articles"]
+            self.processed = set(state["processed"])
+        else:
+            snapshot = pd.read_csv(path, index_col=0)
+            counts = snapshot[COUNT_COLUMNS].to_dict(orient="index")
+        for ticker, row in counts.items():
+            if ticker in self.counts:
+                self.counts[ticker] = {column: row[column] for column in COUNT_COLUMNS}
+
+
+def _state_path(path):
+    path = Path(path)
+    return path.with_name(f"{path.stem}.state.json")
+
+
+def watch_inbox(
+    inbox,
+    tracker,
+    snapshot_path,
+    processed_dir,
+    poll_interval=1.0,
+    snapshot_every=100,
+    max_polls=None,
+):
+    """Watches a directory for new JSON articles and feeds each of them once to the tracker.
+    Files whose name starts with a dot are ignored, so writers can create them under a hidden
+    name and rename them once complete. Processed files are moved out of the inbox, so each
+    scan only lists the articles that are new, and only after a snapshot holding their counts
+    is written, so a crash neither loses nor repeats their counts.
+
+    Args:
+        inbox (str or pathlib.Path): The directory to watch.
+        tracker (RollingSentiment): The running per-ticker counts.
+        snapshot_path (str or pathlib.Path): The CSV file the scores are written to.
+        processed_dir (str or pathlib.Path): The directory processed files are moved to.
+        poll_interval (float): The number of seconds between two scans of the inbox.
+        snapshot_every (int): The number of articles after which a snapshot is written.
+        max_polls (int, optional): Stop after this many scans. Runs forever by default.
+
+    """
+    inbox = Path(inbox)
+    processed_dir = Path(processed_dir)
+    processed_dir.mkdir(parents=True, exist_ok=True)
+    n_polls = 0
+    while max_polls is None or n_polls < max_polls:
+        new_files = sorted(
+            file_path
+            for file_path in inbox.iterdir()
+            if file_path.is_file() and not file_path.name.startswith(".")
+        )
+        batch = []
+        for file_path in new_files:
+            if file_path.name not in tracker.processed:
+                article = read_article(file_path)
+                if article is not None:
+                    tracker.update(article)
+                tracker.processed.add(file_path.name)
+            batch.append(file_path)
+            if len(batch) >= snapshot_every:
+                _commit_batch(batch, tracker, snapshot_path, processed_dir)
+                batch = []
+        if batch:
+            _commit_batch(batch, tracker, snapshot_path, processed_dir)
+        n_polls += 1
+        if max_polls is None or n_polls < max_polls:
+            time.sleep(poll_interval)
+
+
+def _commit_batch(batch, tracker, snapshot_path, processed_dir):
+    tracker.snapshot(snapshot_path)
+    for file_path in batch:
+        os.replace(file_path, processed_dir / file_path.name)
+    tracker.processed.clear()
+
+
+def read_json_lines(stream, tracker, snapshot_path, snapshot_every=100):
+    """Feeds the articles of a stream of JSON lines to the tracker, e.g. sys.stdin.
+
+    Args:
+        stream (file-like): The stream with one JSON article per line.
+        tracker (RollingSentiment): The running per-ticker counts.
+        snapshot_path (str or pathlib.Path): The CSV file the scores are written to.
+        snapshot_every (int): The number of articles after which a snapshot is written.
+
+    """
+    since_snapshot = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            article = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(article, dict):
+            continue
+        tracker.update(article)
+        since_snapshot += 1
+        if since_snapshot >= snapshot_every:
+            tracker.snapshot(snapshot_path)
+            since_snapshot = 0
+    tracker.snapshot(snapshot_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Update per-ticker sentiment scores as new articles arrive.",
+    )
+    parser.add_argument(
+        "--inbox",
+        default="-",
+        help="Directory to watch for new JSON articles, or - to read JSON lines on stdin.",
+    )
+    parser.add_argument(
+        "--ipo-info",
+        default=BLD / "python" / "data" / "ipo_info.csv",
+        help="CSV file with the IPO information produced by the build.",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default=BLD / "python" / "models" / "rolling_sentiment_scores.csv",
+        help="CSV file the running scores are written to.",
+    )
+    parser.add_argument("--snapshot-every", type=int, default=100)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument(
+        "--processed-dir",
+        default=None,
+        help="Directory processed articles are moved to. Required with --inbox.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Start from the counts in an existing snapshot.",
+    )
+    args = parser.parse_args()
+    if args.inbox != "-" and args.processed_dir is None:
+        parser.error("--processed-dir is required when watching an inbox.")
+
+    tracker = RollingSentiment(ps.LM(), pd.read_csv(args.ipo_info))
+    if args.resume and Path(args.snapshot).exists():
+        tracker.restore(args.snapshot)
+    if args.inbox == "-":
+        read_json_lines(sys.stdin, tracker, args.snapshot, args.snapshot_every)
+    else:
+        try:
+            watch_inbox(
+                args.inbox,
+                tracker,
+                args.snapshot,
+                args.processed_dir,
+                args.poll_interval,
+                args.snapshot_every,
+            )
+        except KeyboardInterrupt:
+            tracker.snapshot(args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
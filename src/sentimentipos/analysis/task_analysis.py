@@ -1,9 +1,16 @@
+import pandas as pd
 import pysentiment2 as ps
 import pytask
 
-from sentimentipos.analysis import get_sentiment_scores
-from sentimentipos.config import BLD
-from sentimentipos.data_management import ipo_tickers
+from sentimentipos.analysis import (
+    build_sentiment_cube,
+    get_sentiment_scores,
+    ipo_windows,
+)
+from sentimentipos.config import BLD, MEMORY_BUDGET
+from sentimentipos.data_management import ipo_tickers, iter_dfs_filtered
+
+WINDOW_LENGTHS = [7, 30, 90, None]
 
 
 @pytask.mark.depends_on(BLD / "python" / "data" / "tokenized_texts")
@@ -16,5 +23,28 @@ def task_get_sentiment_scores(depends_on, produces):
         ipo_list,
         lm,
         depends_on,
+        memory_budget=MEMORY_BUDGET,
     )
     sentiment_scores.to_csv(produces)
+
+
+@pytask.mark.depends_on(
+    {
+        "dfs_filtered": BLD / "python" / "data" / "dfs_filtered.pkl",
+        "ipo_info_data": BLD / "python" / "data" / "ipo_info.csv",
+    },
+)
+@pytask.mark.produces(
+    {
+        "cube": BLD / "python" / "models" / "sentiment_cube.npz",
+        "windows": BLD / "python" / "models" / "window_sentiment_scores.csv",
+    },
+)
+def task_sentiment_cube(depends_on, produces):
+    """Build the daily sentiment cube and score pre-IPO windows of several lengths."""
+    lm = ps.LM()
+    ipo_info = pd.read_csv(depends_on["ipo_info_data"])
+    cube = build_sentiment_cube(iter_dfs_filtered(depends_on["dfs_filtered"]), lm)
+    cube.save(produces["cube"])
+    window_scores = cube.window_scores(ipo_windows(ipo_info, WINDOW_LENGTHS))
+    window_scores.to_csv(produces["windows"], index=False)
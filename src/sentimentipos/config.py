@@ -1,4 +1,5 @@
 """All the general configuration of the project."""
+import os
 from pathlib import Path
 
 SRC = Path(__file__).parent.resolve()
@@ -7,4 +8,8 @@ BLD = SRC.joinpath("..", "..", "bld").resolve()
 TEST_DIR = SRC.joinpath("..", "..", "tests").resolve()
 PAPER_DIR = SRC.joinpath("..", "..", "paper").resolve()
 
-__all__ = ["BLD", "SRC", "TEST_DIR"]
+# Memory budget of the data management and analysis stages, e.g. "4G". Without it, the
+# batches have a fixed size and the outputs of each company are kept in memory at once.
+MEMORY_BUDGET = os.environ.get("SENTIMENTIPOS_MEMORY_BUDGET")
+
+__all__ = ["BLD", "SRC", "TEST_DIR", "MEMORY_BUDGET"]
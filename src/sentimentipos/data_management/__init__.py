@@ -4,14 +4,40 @@ from sentimentipos.data_management.clean_data import (
     unzipper,
 )
 from sentimentipos.data_management.data_processing import (
+    ARTICLE_FIELDS,
+    ChainedCorpus,
+    FolderCorpus,
+    PackedCorpus,
+    TextSplitter,
+    compact_articles,
+    concat_article_chunks,
     filter_and_store_df_by_ipo_date,
     filter_df_by_ipo_date,
-    generate_dataframes,
     get_ipo_info,
     ipo_tickers,
+    iter_dfs_filtered,
+    matching_tickers,
+    open_corpus,
+    parse_article,
+    published_date,
     split_text,
     open_excel,
+    pre_ipo_folders,
+    project_article,
+    read_article,
+    read_dfs_filtered,
+    read_manifest,
+    tokenize_text,
+    write_dfs_filtered,
+    write_pickle_atomically,
+)
+from sentimentipos.data_management.corpus import ArticleCorpus, generate_dataframes
+from sentimentipos.data_management.packing import (
+    PackWriter,
+    pack_corpus,
+    train_dictionary,
 )
+from sentimentipos.data_management.partitioning import partition_corpus
 
 __all__ = [
     unzipper,
@@ -23,4 +49,29 @@ __all__ = [
     split_text,
     filter_df_by_ipo_date,
     get_ipo_data_clean,
+    matching_tickers,
+    open_corpus,
+    parse_article,
+    published_date,
+    tokenize_text,
+    read_article,
+    read_manifest,
+    pre_ipo_folders,
+    partition_corpus,
+    write_pickle_atomically,
+    ArticleCorpus,
+    ARTICLE_FIELDS,
+    compact_articles,
+    project_article,
+    TextSplitter,
+    concat_article_chunks,
+    iter_dfs_filtered,
+    read_dfs_filtered,
+    write_dfs_filtered,
+    FolderCorpus,
+    PackedCorpus,
+    ChainedCorpus,
+    pack_corpus,
+    train_dictionary,
+    PackWriter,
 ]
@@ -0,0 +1,430 @@
+import random
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from sentimentipos.data_management.data_processing import (
+    ARTICLE_FIELDS,
+    ChainedCorpus,
+    checkpointed_batches,
+    compact_articles,
+    matching_tickers,
+    open_corpus,
+    pre_ipo_folders,
+    project_article,
+    published_date,
+    split_text,
+)
+from sentimentipos.utilities import AdaptiveBatchSize
+
+
+class ArticleCorpus:
+    """Lazy query over the articles of the news corpus. Every operation returns a new corpus with
+    one more step in its plan, and nothing is read until collect or sample is called. The plan is
+    then optimized and run in a single pass over the files: each file is read and matched against
+    all selected companies once, only the partitions that can contain matching dates are
+    searched, date filters are applied while parsing, and only the needed fields are kept.
+    Date filters always apply before deduplication, whatever the order of the operations.
+
+    Unless other fields are selected, the articles keep the fields of ARTICLE_FIELDS, stored in
+    their compact dtypes.
+
+    Args:
+        folder_path (str or pathlib.Path): The path to the unzipped, partitioned or packed
+            corpus, read with open_corpus.
+
+    """
+
+    def __init__(self, folder_path, plan=()):
+        self.folder_path = Path(folder_path)
+        self.plan = tuple(plan)
+
+    def _then(self, operation, *args):
+        return ArticleCorpus(self.folder_path, (*self.plan, (operation, args)))
+
+    def for_companies(self, ipo_info):
+        """Selects the articles mentioning each company, by name in the title or content.
+
+        Args:
+            ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the
+                ticker, the IPO date and the first day returns of each company in the ipo_list.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("for_companies", ipo_info)
+
+    def by_company(self, *tickers):
+        """Keeps only some of the companies selected with for_companies.
+
+        Args:
+            *tickers (str): The tickers to keep.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("by_company", tickers)
+
+    def before_ipo(self):
+        """Keeps the articles published before the IPO date of each company, as
+        filter_df_by_ipo_date does.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("before_ipo")
+
+    def before(self, date):
+        """Keeps the articles published before a date.
+
+        Args:
+            date (str): The date, excluded.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("before", date)
+
+    def dedupe(self, subset=("title", "text")):
+        """Keeps only the first article of each company with the same values of some fields.
+
+        Args:
+            subset (tuple): The fields identifying duplicates.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("dedupe", tuple(subset))
+
+    def select(self, *columns):
+        """Keeps only some fields of the articles.
+
+        Args:
+            *columns (str): The fields to keep.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("select", columns)
+
+    def tokenize(self):
+        """Turns the articles of each company into its words, as split_text does.
+
+        Returns:
+            ArticleCorpus: The corpus with the step added to its plan.
+
+        """
+        return self._then("tokenize")
+
+    def _optimize(self):
+        spec = {
+            "ipo_info": None,
+            "tickers": None,
+            "before_ipo": False,
+            "before": None,
+            "dedupe": None,
+            "columns": None,
+            "tokenize": False,
+        }
+        for operation, args in self.plan:
+            if operation == "for_companies":
+                spec["ipo_info"] = args[0]
+            elif operation == "by_company":
+                tickers = list(args[0])
+                if spec["tickers"] is not None:
+                    tickers = [t for t in spec["tickers"] if t in tickers]
+                spec["tickers"] = tickers
+            elif operation == "before_ipo":
+                spec["before_ipo"] = True
+            elif operation == "before":
+                date = pd.to_datetime(args[0], utc=True).date()
+                if spec["before"] is not None:
+                    date = min(spec["before"], date)
+                spec["before"] = date
+            elif operation == "dedupe":
+                spec["dedupe"] = args[0]
+            elif operation == "select":
+                columns = list(args[0])
+                if spec["columns"] is not None:
+                    columns = [c for c in spec["columns"] if c in columns]
+                spec["columns"] = columns
+            elif operation == "tokenize":
+                spec["tokenize"] = True
+
+        if spec["ipo_info"] is None:
+            info = (
+                "Select the companies with for_companies before collecting the corpus."
+            )
+            raise ValueError(info)
+        ipo_info = spec["ipo_info"]
+        companies = dict(zip(ipo_info["ticker"], ipo_info["company_name"]))
+        tickers = list(companies) if spec["tickers"] is None else spec["tickers"]
+        ipo_dates = dict(
+            zip(
+                ipo_info["ticker"],
+                pd.to_datetime(ipo_info["ipo_date"], errors="coerce", utc=True).dt.date,
+            ),
+        )
+        spec["companies"] = {ticker: companies[ticker] for ticker in tickers}
+        spec["cutoffs"] = {}
+        for ticker in tickers:
+            cutoffs = [spec["before"]]
+            if spec["before_ipo"]:
+                cutoffs.append(ipo_dates[ticker])
+            cutoffs = [cutoff for cutoff in cutoffs if cutoff is not None]
+            spec["cutoffs"][ticker] = min(cutoffs) if cutoffs else None
+
+        needed = list(ARTICLE_FIELDS if spec["columns"] is None else spec["columns"])
+        extra = list(spec["dedupe"] or [])
+        if spec["tokenize"]:
+            extra.append("text")
+        if any(cutoff is not None for cutoff in spec["cutoffs"].values()):
+            extra.append("published")
+        needed += [column for column in extra if column not in needed]
+        spec["needed"] = needed
+
+        folders = {}
+        for ticker, cutoff in spec["cutoffs"].items():
+            ticker_folders = (
+                [self.folder_path]
+                if cutoff is None
+                else pre_ipo_folders(self.folder_path, str(cutoff))
+            )
+            for folder in ticker_folders:
+                folders.setdefault(folder, []).append(ticker)
+        spec["folders"] = folders
+        return spec
+
+    def explain(self):
+        """Describes how the plan will be run.
+
+        Returns:
+            str: One line per step of the optimized plan.
+
+        """
+        spec = self._optimize()
+        lines = [
+            f"scan {len(spec['folders'])} folder(s) of {self.folder_path} once, matching "
+            f"{len(spec['companies'])} companies per article",
+        ]
+        if any(cutoff is not None for cutoff in spec["cutoffs"].values()):
+            lines.append("filter on the publication date while parsing")
+        lines.append(f"keep only the fields {spec['needed']} while parsing")
+        if spec["dedupe"] is not None:
+            lines.append(f"drop duplicates on {list(spec['dedupe'])}")
+        if spec["tokenize"]:
+            lines.append("split the texts of each company into words")
+        return "\n".join(lines)
+
+    def _scan_article(self, data, candidates, spec):
+        if data is None:
+            return {}
+        tickers = matching_tickers(data, {t: spec["companies"][t] for t in candidates})
+        if not tickers:
+            return {}
+        date = None
+        if any(spec["cutoffs"][ticker] is not None for ticker in tickers):
+            date = published_date(data.get("published"))
+        data = project_article(data, spec["needed"])
+        records = {}
+        for ticker in tickers:
+            cutoff = spec["cutoffs"][ticker]
+            if cutoff is None or (date is not None and date < cutoff):
+                records[ticker] = data
+        return records
+
+    def _scan(self, spec, checkpoint_dir, batch_sizes):
+        corpora = {folder: open_corpus(folder) for folder in spec["folders"]}
+        candidates = {corpora[folder]: spec["folders"][folder] for folder in corpora}
+        corpus = ChainedCorpus(corpora.values())
+
+        def scan(files):
+            batch = {ticker: {} for ticker in spec["companies"]}
+            for key in files:
+                data = corpus.read(key)
+                tickers = candidates[corpus.owners[key]]
+                for ticker, record in self._scan_article(data, tickers, spec).items():
+                    batch[ticker][key] = record
+            return batch
+
+        key = {
+            "folder_path": str(self.folder_path),
+            "plan": [(op, repr(args)) for op, args in self.plan],
+            "companies": spec["companies"],
+            "cutoffs": {ticker: str(c) for ticker, c in spec["cutoffs"].items()},
+            "fields": spec["needed"],
+        }
+        return checkpointed_batches(corpus, key, checkpoint_dir, scan, batch_sizes)
+
+    def _chunk(self, records, spec, seen):
+        df = compact_articles(records, spec["needed"])
+        if spec["dedupe"] is not None:
+            df = df.drop_duplicates(subset=list(spec["dedupe"]))
+            keys = pd.util.hash_pandas_object(df[list(spec["dedupe"])], index=False)
+            new = ~keys.isin(seen)
+            seen.update(keys[new])
+            df = df[new.to_numpy()]
+        if spec["columns"] is not None and not spec["tokenize"]:
+            df = df[spec["columns"]]
+        return df
+
+    def _chunks(self, spec, memory_budget, checkpoint_dir, batch_size):
+        batch_sizes = AdaptiveBatchSize(memory_budget, initial=batch_size)
+        pending = {ticker: {} for ticker in spec["companies"]}
+        seen = {ticker: set() for ticker in spec["companies"]}
+        flushed = set()
+        for batch in self._scan(spec, checkpoint_dir, batch_sizes):
+            for ticker, records in batch.items():
+                pending[ticker].update(records)
+            if batch_sizes.under_pressure():
+                for ticker, records in pending.items():
+                    if records:
+                        yield ticker, self._chunk(records, spec, seen[ticker])
+                        flushed.add(ticker)
+                        pending[ticker] = {}
+        for ticker, records in pending.items():
+            if records or ticker not in flushed:
+                yield ticker, self._chunk(records, spec, seen[ticker])
+
+        if checkpoint_dir is not None:
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+    def collect(self, checkpoint_dir=None, batch_size=1000):
+        """Runs the plan.
+
+        Args:
+            checkpoint_dir (str or pathlib.Path, optional): If given, the results are stored
+                there in batches of files, and an interrupted run resumes after the last
+                finished batch. The folder is removed once the plan has run.
+            batch_size (int): The number of files per checkpointed batch.
+
+        Returns:
+            dfs (dict): A dictionary associating to each ticker the dataframe of its articles,
+            indexed by file path, or its words if the plan ends with tokenize.
+
+        """
+        spec = self._optimize()
+        dfs = {}
+        for ticker, df in self._chunks(spec, None, checkpoint_dir, batch_size):
+            if spec["tokenize"]:
+                df = split_text(df) if len(df) else pd.DataFrame(columns=["words"])
+            dfs[ticker] = df
+        return dfs
+
+    def collect_chunks(self, memory_budget=None, checkpoint_dir=None, batch_size=1000):
+        """Runs the plan within a memory budget, yielding the articles of each company in
+        chunks instead of returning them all at once. The number of files read per batch adapts
+        to the resident memory of the process, and whenever it is above the high watermark of
+        the budget, the articles found so far are yielded as chunks, so that they can be
+        written to disk, e.g. with write_dfs_filtered. Concatenated, the chunks of a company
+        equal its dataframe returned by collect.
+
+        Args:
+            memory_budget (int or str, optional): The memory budget, e.g. "4G". Without it, one
+                chunk per company is yielded at the end.
+            checkpoint_dir (str or pathlib.Path, optional): The folder where the results are
+                stored in batches, as in collect.
+            batch_size (int): The number of files in the first batch.
+
+        Returns:
+            chunks (iterator): Pairs of a ticker and a dataframe with some of its articles,
+            indexed by file path. Every company gets at least one chunk.
+
+        """
+        spec = self._optimize()
+        if spec["tokenize"]:
+            info = (
+                "collect_chunks returns articles, split their texts with TextSplitter."
+            )
+            raise ValueError(info)
+        return self._chunks(spec, memory_budget, checkpoint_dir, batch_size)
+
+    def sample(self, batch_size=1000, seed=0):
+        """Runs the plan on the files of the corpus in a random order, in batches, without
+        reading the whole corpus first. After any number of batches, the files read among
+        those a company is searched in are a simple random sample of them, so the articles
+        found so far give unbiased estimates for the whole corpus.
+
+        Args:
+            batch_size (int): The number of files read per batch.
+            seed (int): The seed of the random order.
+
+        Returns:
+            n_files (dict): A dictionary associating to each ticker the number of files it is
+            searched in.
+            batches (iterator): For each batch, a dictionary associating to each ticker the
+            number of its files in the batch, and a dictionary associating to each ticker the
+            dataframe of the articles found in the batch.
+
+        """
+        spec = self._optimize()
+        if spec["tokenize"]:
+            info = "sample returns articles, split their texts with tokenize_text."
+            raise ValueError(info)
+        keys = []
+        for folder, tickers in spec["folders"].items():
+            corpus = open_corpus(folder)
+            keys += [(key, corpus, tickers) for key in corpus.keys()]
+        n_files = dict.fromkeys(spec["companies"], 0)
+        for _key, _corpus, tickers in keys:
+            for ticker in tickers:
+                n_files[ticker] += 1
+        random.Random(seed).shuffle(keys)
+        return n_files, self._sample(spec, keys, batch_size)
+
+    def _sample(self, spec, keys, batch_size):
+        seen = {ticker: set() for ticker in spec["companies"]}
+        for start in range(0, len(keys), batch_size):
+            files = dict.fromkeys(spec["companies"], 0)
+            records = {ticker: {} for ticker in spec["companies"]}
+            for key, corpus, tickers in keys[start : start + batch_size]:
+                for ticker in tickers:
+                    files[ticker] += 1
+                data = corpus.read(key)
+                for ticker, record in self._scan_article(data, tickers, spec).items():
+                    records[ticker][key] = record
+            dfs = {
+                ticker: self._chunk(ticker_records, spec, seen[ticker])
+                for ticker, ticker_records in records.items()
+            }
+            yield files, dfs
+
+
+def generate_dataframes(
+    folder_path,
+    ipo_info,
+    checkpoint_dir=None,
+    batch_size=1000,
+    fields=tuple(ARTICLE_FIELDS),
+):
+    """Creates a dictionary assigning to each company a dataframe with the articles mentioning
+    it, by name in the title or content. The corpus is read once for all companies with
+    ArticleCorpus, without filtering the articles by date.
+
+    Args:
+        folder_path (str): The path to the folder to search through.
+        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker, the IPO date
+            and the first day returns of each company in the ipo_list.
+        checkpoint_dir (str, optional): The folder where the progress is stored, see
+            ArticleCorpus.collect.
+        batch_size (int): The number of files searched per checkpointed batch.
+        fields (tuple): The fields to keep, stored in the compact dtypes of ARTICLE_FIELDS.
+
+    Returns:
+        df_dict (dict): the dictionary associating to each dataframe name (df_<ticker>) the respective dataframe.
+
+    """
+    query = ArticleCorpus(folder_path).for_companies(ipo_info).select(*fields)
+    dfs = query.collect(checkpoint_dir, batch_size)
+    df_dict = {
+        f"df_{name}": dfs[ticker]
+        for name, ticker in zip(ipo_info.index, ipo_info["ticker"])
+    }
+    return df_dict
@@ -1,9 +1,29 @@
+import hashlib
 import json
+import os
+import pickle
+import shutil
 import string
+import zlib
 from pathlib import Path
 
 import pandas as pd
 
+MANIFEST_NAME = "manifest.json"
+PACK_INDEX_NAME = "index.json"
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation.replace("-", ""))
+
+# The fields kept from each article while parsing, with the dtypes they are stored in: text in
+# Arrow strings, values repeated across articles in categoricals and dates in datetime64.
+ARTICLE_FIELDS = {
+    "title": "string[pyarrow]",
+    "published": "datetime64[ns, UTC]",
+    "text": "string[pyarrow]",
+    "site": "category",
+}
+# Path to the fields that are nested in the JSON articles.
+NESTED_FIELDS = {"site": ("thread", "site")}
+
 
 def ipo_tickers():
     """Defines the tickers of the companies that need to be analyzed. This function is used to
@@ -97,6 +117,330 @@ def contains_word(file_path, word):
     return word in data.get("title", "") or word in data.get("content", "")
 
 
+def read_article(file_path):
+    """Reads a JSON article, skipping files that are not valid JSON.
+
+    Args:
+        file_path (str or pathlib.Path): The path of the JSON file.
+
+    Returns:
+        data (dict): The parsed article, or None if the file could not be parsed.
+
+    """
+    try:
+        with open(file_path, encoding="latin-1") as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def parse_article(content):
+    """Parses the raw bytes of a JSON article in the same way as read_article.
+
+    Args:
+        content (bytes): The content of the JSON file.
+
+    Returns:
+        data (dict): The parsed article, or None if the content could not be parsed.
+
+    """
+    try:
+        data = json.loads(content.decode("latin-1"))
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+class FolderCorpus:
+    """Reader of a corpus stored as one JSON file per article, keyed by file path.
+
+    Args:
+        folder_path (str or pathlib.Path): The path to the folder of the corpus.
+
+    """
+
+    def __init__(self, folder_path):
+        self.folder_path = Path(folder_path)
+
+    def keys(self):
+        """Returns the keys of all articles, in the order of iter_articles."""
+        return [str(path) for path in self.folder_path.rglob("*") if path.is_file()]
+
+    def read(self, key):
+        """Reads one article.
+
+        Args:
+            key (str): The key of the article.
+
+        Returns:
+            data (dict): The parsed article, or None if it is not valid JSON.
+
+        """
+        return read_article(key)
+
+    def fingerprint(self):
+        """Returns a digest of the keys, sizes and modification times of all articles, which
+        changes whenever an article is added, removed or edited.
+
+        Returns:
+            str: The hexadecimal digest.
+
+        """
+        digest = hashlib.sha256()
+        for key in self.keys():
+            stat = os.stat(key)
+            digest.update(f"{key}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+        return digest.hexdigest()
+
+    def iter_articles(self):
+        """Reads all articles one after the other.
+
+        Yields:
+            tuple: The key and the parsed article, None if it is not valid JSON.
+
+        """
+        for key in self.keys():
+            yield key, self.read(key)
+
+
+class PackedCorpus:
+    """Reader of a corpus packed with pack_corpus into a few large shard files. The index maps
+    every article to its offset in a block of a shard, so any article is read with a single
+    seek, and streaming over all articles reads every block once, in the order of the shards.
+    Articles are keyed by the path they had in the packed folder, with the packed folder in
+    place of the original one.
+
+    Args:
+        folder_path (str or pathlib.Path): The path to the folder of the packed corpus.
+
+    """
+
+    def __init__(self, folder_path):
+        self.folder_path = Path(folder_path)
+        with open(self.folder_path / PACK_INDEX_NAME) as f:
+            index = json.load(f)
+        self.compression = index["compression"]
+        self.dictionary = b""
+        if index["dictionary"] is not None:
+            self.dictionary = (self.folder_path / index["dictionary"]).read_bytes()
+        self.shards = index["shards"]
+        self.blocks = index["blocks"]
+        self.articles = {
+            str(self.folder_path / name): (block, start, length)
+            for name, block, start, length in index["articles"]
+        }
+        self._cached_block = (None, None)
+
+    def keys(self):
+        """Returns the keys of all articles, in the order of iter_articles."""
+        return list(self.articles)
+
+    def _block(self, block):
+        if self._cached_block[0] != block:
+            shard, offset, length = self.blocks[block]
+            with open(self.folder_path / self.shards[shard], "rb") as f:
+                f.seek(offset)
+                content = f.read(length)
+            if self.compression == "zlib":
+                decompressor = zlib.decompressobj(zdict=self.dictionary)
+                content = decompressor.decompress(content) + decompressor.flush()
+            self._cached_block = (block, content)
+        return self._cached_block[1]
+
+    def read_bytes(self, key):
+        """Reads the raw content of one article.
+
+        Args:
+            key (str): The key of the article.
+
+        Returns:
+            bytes: The content of the original JSON file.
+
+        """
+        block, start, length = self.articles[str(key)]
+        return self._block(block)[start : start + length]
+
+    def read(self, key):
+        """Reads one article.
+
+        Args:
+            key (str): The key of the article.
+
+        Returns:
+            data (dict): The parsed article, or None if it is not valid JSON.
+
+        """
+        return parse_article(self.read_bytes(key))
+
+    def fingerprint(self):
+        """Returns a digest of the folder and the index, which changes whenever articles are
+        appended, since the shards themselves are never rewritten.
+
+        Returns:
+            str: The hexadecimal digest.
+
+        """
+        digest = hashlib.sha256(str(self.folder_path).encode())
+        digest.update((self.folder_path / PACK_INDEX_NAME).read_bytes())
+        return digest.hexdigest()
+
+    def iter_articles(self):
+        """Reads all articles one after the other, one block at a time.
+
+        Yields:
+            tuple: The key and the parsed article, None if it is not valid JSON.
+
+        """
+        for key in self.articles:
+            yield key, self.read(key)
+
+
+class ChainedCorpus:
+    """Reader of several corpora one after the other, e.g. the packed partitions of a corpus.
+
+    Args:
+        corpora (list): The readers of the corpora.
+
+    """
+
+    def __init__(self, corpora):
+        self.corpora = list(corpora)
+        self.owners = {key: corpus for corpus in self.corpora for key in corpus.keys()}
+
+    def keys(self):
+        """Returns the keys of all articles, in the order of iter_articles."""
+        return list(self.owners)
+
+    def read(self, key):
+        """Reads one article.
+
+        Args:
+            key (str): The key of the article.
+
+        Returns:
+            data (dict): The parsed article, or None if it is not valid JSON.
+
+        """
+        return self.owners[str(key)].read(key)
+
+    def fingerprint(self):
+        """Returns a digest of the fingerprints of all corpora.
+
+        Returns:
+            str: The hexadecimal digest.
+
+        """
+        digest = hashlib.sha256()
+        for corpus in self.corpora:
+            digest.update(corpus.fingerprint().encode())
+        return digest.hexdigest()
+
+    def iter_articles(self):
+        """Reads all articles one after the other.
+
+        Yields:
+            tuple: The key and the parsed article, None if it is not valid JSON.
+
+        """
+        for corpus in self.corpora:
+            yield from corpus.iter_articles()
+
+
+def open_corpus(folder_path):
+    """Opens the reader of a corpus, whether it is stored as one file per article, packed with
+    pack_corpus, or partitioned with partition_corpus and then packed. All readers have the
+    same keys, read and iter_articles methods.
+
+    Args:
+        folder_path (str or pathlib.Path): The path to the folder of the corpus.
+
+    Returns:
+        corpus (FolderCorpus, PackedCorpus or ChainedCorpus): The reader of the corpus.
+
+    """
+    folder = Path(folder_path)
+    if (folder / PACK_INDEX_NAME).exists():
+        return PackedCorpus(folder)
+    if read_manifest(folder) is not None:
+        packed = [
+            PackedCorpus(child)
+            for child in sorted(folder.iterdir())
+            if (child / PACK_INDEX_NAME).exists()
+        ]
+        if packed:
+            return ChainedCorpus(packed)
+    return FolderCorpus(folder)
+
+
+def matching_tickers(data, companies):
+    """Returns the tickers of all tracked companies mentioned in an already parsed article. A
+    company is mentioned if its name appears in the title or content of the article, as in
+    contains_word.
+
+    Args:
+        data (dict): The parsed JSON article.
+        companies (dict): A dictionary associating to each ticker the name of the company.
+
+    Returns:
+        tickers (list): The tickers of the companies mentioned in the article.
+
+    """
+    title = data.get("title", "") or ""
+    content = data.get("content", "") or ""
+    tickers = [
+        ticker
+        for ticker, company_name in companies.items()
+        if company_name in title or company_name in content
+    ]
+    return tickers
+
+
+def project_article(data, fields):
+    """Keeps only some fields of a parsed article, looking up nested fields by their path in
+    NESTED_FIELDS.
+
+    Args:
+        data (dict): The parsed JSON article.
+        fields (list): The fields to keep.
+
+    Returns:
+        record (dict): The value of each field, None if the article does not have it.
+
+    """
+    record = {}
+    for field in fields:
+        value = data
+        for key in NESTED_FIELDS.get(field, (field,)):
+            value = value.get(key) if isinstance(value, dict) else None
+        record[field] = value
+    return record
+
+
+def compact_articles(records, fields):
+    """Creates the dataframe of some projected articles, storing each field of ARTICLE_FIELDS in
+    its compact dtype. Other fields are kept as Python objects.
+
+    Args:
+        records (dict): A dictionary associating to each file path its projected article.
+        fields (list): The fields of the articles, in the order of the columns.
+
+    Returns:
+        df (pd.DataFrame): The dataframe of the articles, indexed by file path.
+
+    """
+    df = pd.DataFrame(list(records.values()), index=list(records), columns=list(fields))
+    for field in df.columns:
+        dtype = ARTICLE_FIELDS.get(field)
+        if dtype is None:
+            continue
+        if dtype.startswith("datetime64"):
+            df[field] = pd.to_datetime(df[field], errors="coerce", utc=True)
+        else:
+            df[field] = df[field].astype(dtype)
+    return df
+
+
 def get_matching_files(folder_path, word):
     """Searches the folder and its subfolders for files that contain the input word in their 'title'
     field, returning a list of matching files. Specifically, it searches through the unzipped folder
@@ -112,51 +456,229 @@ def get_matching_files(folder_path, word):
 
     """
     matching_files = []
-    folder = Path(folder_path)
-    for file_path in folder.rglob("*"):
-        if file_path.is_file() and contains_word(str(file_path), word):
-            matching_files.append(str(file_path))
+    corpus = open_corpus(folder_path)
+    for key in corpus.keys():
+        data = corpus.read(key)
+        if data is not None and matching_tickers(data, {word: word}):
+            matching_files.append(key)
     return matching_files
 
 
-def generate_dataframes(folder_path, ipo_info):
-    """First, it creates an empty folder to store the dictionaries that will be creates in the
-    function.
+def read_manifest(folder_path):
+    """Reads the manifest of a corpus that was partitioned by publication date with
+    partition_corpus.
+
+    Args:
+        folder_path (str): The path to the corpus folder.
+
+    Returns:
+        manifest (dict): The parsed manifest, or None if the corpus is not partitioned.
+
+    """
+    manifest_path = Path(folder_path) / MANIFEST_NAME
+    if not manifest_path.exists():
+        return None
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    return manifest
 
-    Then, it uses the function get_matching files to find the articles
-    with the desired word in the title. After creating an empty dictionary, it
-    associates to each element a pandas dataframe created with a for loop containing all
-    the articles with the desired word in the title. The Dataframe is then stored in the
-    empty folder created at the beginning of the function. Therefore, the function will
-    create a dictionary assigning to each company a dataframe with the information
-    contained in the JSON files that the function get_matching_files retrieves.
+
+def pre_ipo_folders(folder_path, ipo_date):
+    """Returns the folders that can contain articles published before the IPO date. For a
+    partitioned corpus these are only the partitions starting before the IPO date, so the work
+    per company grows with its pre-IPO window instead of the size of the corpus. For a corpus
+    that is not partitioned this is the whole folder. If the IPO date is missing or cannot be
+    parsed, all partitions are searched, as for a corpus that is not partitioned.
 
     Args:
-        folder_path (str): The path to the folder to search through.
-        ipo_info (pd.DataFrame): a pandas dataframe containing the name of the company, the ticker, the IPO date
-            and the first day returns of each company in the ipo_list.
+        folder_path (str): The path to the corpus folder.
+        ipo_date (str): The IPO date of the company.
 
     Returns:
-        df_dict (dict): the dictionary associating to each dataframe name (df_<company_name>) the respective dataframe.
+        folders (list): The paths of the folders to search.
 
     """
-    df_dict = {}
-    for ticker, row in ipo_info.iterrows():
-        company_name = row["company_name"]
-        word = company_name
-        matching_files = get_matching_files(folder_path, word)
+    manifest = read_manifest(folder_path)
+    if manifest is None:
+        return [Path(folder_path)]
+    ipo_date = pd.to_datetime(ipo_date, errors="coerce", utc=True)
+    folders = [
+        Path(folder_path) / partition["name"]
+        for partition in manifest["partitions"]
+        if pd.isna(ipo_date)
+        or pd.Timestamp(partition["start"]).date() < ipo_date.date()
+    ]
+    return folders
 
-        output_dict = {}
-        for file_path in matching_files:
-            with open(file_path, encoding="latin-1") as f:
-                data = json.load(f)
-                output_dict[file_path] = data
 
-        df_name = f"df_{ticker}"
-        df = pd.DataFrame.from_dict(output_dict, orient="index")
-        df_dict[df_name] = df
+def write_pickle_atomically(obj, path):
+    """Writes an object to a pickle file that is replaced only once it is completely written and
+    flushed to disk, so that a crash never leaves a truncated file behind.
+
+    Args:
+        obj (object): The object to store.
+        path (pathlib.Path): The path of the pickle file.
+
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
 
-    return df_dict
+def write_dfs_filtered(chunks, tickers, path):
+    """Writes the filtered articles of the companies as a stream of pickled chunks, so that they
+    are written and read back one chunk at a time instead of all at once. As in
+    write_pickle_atomically, the file is replaced only once it is completely written.
+
+    Args:
+        chunks (iterable): Pairs of a ticker and a dataframe with some of its articles, in the
+            order of the articles of each ticker.
+        tickers (list): The tickers of the companies, in the order used by read_dfs_filtered.
+        path (pathlib.Path): The path of the file.
+
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"tickers": list(tickers)}, f)
+        for ticker, df in chunks:
+            pickle.dump((ticker, df), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_dfs_filtered(path):
+    """Reads the chunks of filtered articles written by write_dfs_filtered one at a time. Files
+    holding a single list of (dataframe, ticker) pairs, as written by earlier builds, are read
+    as well.
+
+    Args:
+        path (pathlib.Path): The path of the file.
+
+    Yields:
+        tuple: A ticker and a dataframe with some of its articles.
+
+    """
+    with open(path, "rb") as f:
+        header = pickle.load(f)
+        if isinstance(header, list):
+            for df, ticker in header:
+                yield ticker, df
+            return
+        while True:
+            try:
+                ticker, df = pickle.load(f)
+            except EOFError:
+                return
+            yield ticker, df
+
+
+def concat_article_chunks(chunks):
+    """Concatenates chunks of the articles of a company, restoring the categorical columns whose
+    categories differ between chunks.
+
+    Args:
+        chunks (list): The dataframes of the chunks, in order.
+
+    Returns:
+        df (pd.DataFrame): The dataframe of all articles.
+
+    """
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0]
+    df = pd.concat(chunks)
+    for column, dtype in chunks[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_dfs_filtered(path):
+    """Reads all filtered articles written by write_dfs_filtered.
+
+    Args:
+        path (pathlib.Path): The path of the file.
+
+    Returns:
+        dfs_filtered (list): The pairs of the dataframe of the articles of each company and its
+        ticker, in the order of the tickers given to write_dfs_filtered.
+
+    """
+    chunks = {}
+    for ticker, df in iter_dfs_filtered(path):
+        chunks.setdefault(ticker, []).append(df)
+    with open(path, "rb") as f:
+        header = pickle.load(f)
+    tickers = (
+        [ticker for _, ticker in header]
+        if isinstance(header, list)
+        else header["tickers"]
+    )
+    return [
+        (concat_article_chunks(chunks.get(ticker, [])), ticker) for ticker in tickers
+    ]
+
+
+def checkpointed_batches(corpus, key, checkpoint_dir, scan, batch_sizes):
+    """Scans the articles of a corpus in durable batches. The keys of the articles to scan and
+    the result of every finished batch are stored in checkpoint_dir, so that a run which was
+    interrupted resumes after the last finished batch and yields the same results as an
+    uninterrupted run. The stored progress is discarded if any input changed, including the
+    articles of the corpus, which are compared by their fingerprint.
+
+    Args:
+        corpus (FolderCorpus, PackedCorpus or ChainedCorpus): The reader of the corpus.
+        key (dict): A description of the other inputs the results depend on.
+        checkpoint_dir (str or pathlib.Path, optional): The folder where the progress is
+            stored. Without it, nothing is stored.
+        scan (callable): The function computing the result of a batch from the keys of its
+            articles.
+        batch_sizes (AdaptiveBatchSize): The number of articles per batch.
+
+    Yields:
+        The result of scan for every batch, in the order of the corpus.
+
+    """
+    files = None
+    if checkpoint_dir is not None:
+        checkpoint_dir = Path(checkpoint_dir)
+        key = {**key, "corpus": corpus.fingerprint()}
+        files_path = checkpoint_dir / "files.pkl"
+        if files_path.exists():
+            stored = pd.read_pickle(files_path)
+            if stored["key"] == key:
+                files = stored["files"]
+            else:
+                shutil.rmtree(checkpoint_dir)
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    if files is None:
+        files = corpus.keys()
+        if checkpoint_dir is not None:
+            write_pickle_atomically({"key": key, "files": files}, files_path)
+
+    start = 0
+    while start < len(files):
+        batch_path = None
+        if checkpoint_dir is not None:
+            batch_path = checkpoint_dir / f"batch_{start:09d}.pkl"
+            if batch_path.exists():
+                stored = pd.read_pickle(batch_path)
+                yield stored["records"]
+                start = stored["stop"]
+                continue
+        stop = min(start + batch_sizes.size, len(files))
+        records = scan(files[start:stop])
+        if batch_path is not None:
+            write_pickle_atomically({"stop": stop, "records": records}, batch_path)
+        yield records
+        batch_sizes.update()
+        start = stop
 
 
 def filter_df_by_ipo_date(df_dict, company_name, ticker, ipo_info):
@@ -196,6 +718,23 @@ def filter_df_by_ipo_date(df_dict, company_name, ticker, ipo_info):
     return df_filtered
 
 
+def published_date(published):
+    """Converts the publication timestamp of a single article to a date, in the same way as
+    filter_df_by_ipo_date does for a whole dataframe.
+
+    Args:
+        published (str): The publication timestamp of the article.
+
+    Returns:
+        date (datetime.date): The UTC publication date, or None if it cannot be parsed.
+
+    """
+    timestamp = pd.to_datetime(published, errors="coerce", utc=True)
+    if pd.isna(timestamp):
+        return None
+    return timestamp.date()
+
+
 def filter_and_store_df_by_ipo_date(ipo_info, df_dict):
     """After creating an empty dictionary, it fills it with a for loop associating to each element
     the corresponding dataframe filtered by IPO date.
@@ -239,11 +778,69 @@ def split_text(df):
     all_text = []
     for _index, row in text_col.iteritems():
         all_text.append(row)
-    punctuation = string.punctuation.replace("-", "")
-    only_text = [
-        text.translate(str.maketrans("", "", punctuation)) for text in all_text
-    ]
+    only_text = [text.translate(PUNCTUATION_TABLE) for text in all_text]
     ticker_text_str = ",".join(only_text)
     words = ticker_text_str.split()
     words_df = pd.DataFrame(words, columns=["words"])
     return words_df
+
+
+class TextSplitter:
+    """Splits the texts of one company into words one chunk of articles at a time. Since
+    split_text joins all texts with commas before splitting them, the last word of a chunk may
+    continue in the next chunk, so it is held back until the next chunk or finish. The words of
+    all chunks together are those split_text returns for all the articles at once.
+    """
+
+    def __init__(self):
+        self.pending = None
+
+    def split(self, df):
+        """Splits the texts of the next chunk of articles.
+
+        Args:
+            df (pd.DataFrame): The chunk, with a 'text' column.
+
+        Returns:
+            words_df (pd.DataFrame): The words that are complete, with a single column 'words'.
+
+        """
+        if len(df) == 0:
+            return pd.DataFrame([], columns=["words"])
+        text = ",".join(text.translate(PUNCTUATION_TABLE) for text in df["text"])
+        if self.pending is not None:
+            text = f"{self.pending},{text}"
+        end = len(text)
+        while end and not text[end - 1].isspace():
+            end -= 1
+        self.pending = text[end:]
+        words_df = pd.DataFrame(text[:end].split(), columns=["words"])
+        return words_df
+
+    def finish(self):
+        """Returns the last word held back, after the last chunk.
+
+        Returns:
+            words_df (pd.DataFrame): The remaining words, with a single column 'words'.
+
+        """
+        words = [] if self.pending is None else self.pending.split()
+        self.pending = None
+        return pd.DataFrame(words, columns=["words"])
+
+
+def tokenize_text(text):
+    """Splits the text of a single article into individual words, removing the same punctuation
+    as split_text.
+
+    Args:
+        text (str): The text of the article, None or missing if it has none.
+
+    Returns:
+        words (list): The individual words of the text.
+
+    """
+    if not isinstance(text, str):
+        return []
+    words = text.translate(PUNCTUATION_TABLE).split()
+    return words
@@ -0,0 +1,285 @@
+import collections
+import contextlib
+import json
+import os
+import re
+import shutil
+import zlib
+from pathlib import Path
+
+from sentimentipos.data_management.data_processing import (
+    MANIFEST_NAME,
+    PACK_INDEX_NAME,
+    FolderCorpus,
+    parse_article,
+)
+from sentimentipos.data_management.partitioning import (
+    check_freq,
+    partition_name,
+    write_manifest,
+)
+
+DICTIONARY_NAME = "dictionary.bin"
+# Candidate dictionary entries: quoted JSON keys and values, and other runs of bytes.
+DICTIONARY_SEGMENTS = re.compile(rb'"[^"\\]{1,64}"\s*:?|[^\s"]{4,32}')
+
+
+def train_dictionary(samples, size=32768):
+    """Builds a preset dictionary for zlib from sample articles. The byte strings that occur in
+    most samples, such as the JSON keys, site names and frequent words, are ranked by the bytes
+    they save, and the best ones are put at the end of the dictionary, where zlib reaches them
+    with the shortest distances.
+
+    Args:
+        samples (list): The raw contents of the sample articles.
+        size (int): The maximum size of the dictionary in bytes, at most 32 KiB for zlib.
+
+    Returns:
+        dictionary (bytes): The preset dictionary.
+
+    """
+    counts = collections.Counter()
+    for sample in samples:
+        counts.update(set(DICTIONARY_SEGMENTS.findall(sample)))
+    ranked = sorted(
+        (segment for segment, count in counts.items() if count > 1),
+        key=lambda segment: (counts[segment] * len(segment), segment),
+        reverse=True,
+    )
+    chosen = []
+    total = 0
+    for segment in ranked:
+        if total + len(segment) <= size:
+            chosen.append(segment)
+            total += len(segment)
+    return b"".join(reversed(chosen))
+
+
+class PackWriter:
+    """Appends articles to a packed corpus. The articles are grouped into blocks of about
+    block_size bytes, each optionally compressed with zlib and the preset dictionary of the
+    corpus, and the blocks are appended to shard files of at most about shard_size bytes. The
+    index, mapping every article to its block and offset, is replaced once all articles are
+    written, so a crash while appending leaves the corpus as it was before, apart from
+    unreferenced bytes at the end of the last shard.
+
+    Args:
+        folder_path (str or pathlib.Path): The path to the folder of the packed corpus. If it
+            already holds a packed corpus, the articles are appended to it.
+        shard_size (int): The size in bytes above which a new shard is started.
+        block_size (int): The size in bytes of the uncompressed blocks.
+        compress (bool): Whether to compress the blocks, for a new corpus.
+        dictionary (bytes, optional): The preset dictionary of the compression, for a new
+            corpus.
+
+    """
+
+    def __init__(
+        self,
+        folder_path,
+        shard_size=1024**3,
+        block_size=65536,
+        compress=True,
+        dictionary=None,
+    ):
+        self.folder_path = Path(folder_path)
+        self.shard_size = shard_size
+        self.block_size = block_size
+        self.folder_path.mkdir(parents=True, exist_ok=True)
+        index_path = self.folder_path / PACK_INDEX_NAME
+        if index_path.exists():
+            with open(index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {
+                "compression": "zlib" if compress else None,
+                "dictionary": DICTIONARY_NAME if compress and dictionary else None,
+                "shards": [],
+                "blocks": [],
+                "articles": [],
+            }
+            if self.index["dictionary"] is not None:
+                (self.folder_path / DICTIONARY_NAME).write_bytes(dictionary)
+        self.dictionary = b""
+        if self.index["dictionary"] is not None:
+            self.dictionary = (self.folder_path / self.index["dictionary"]).read_bytes()
+        self.names = {name for name, *_ in self.index["articles"]}
+        self.buffer = []
+        self.buffer_size = 0
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def add(self, name, content):
+        """Appends an article.
+
+        Args:
+            name (str): The path of the article relative to the folder of the corpus.
+            content (bytes): The raw content of the article.
+
+        """
+        self.names.add(name)
+        self.buffer.append((name, content))
+        self.buffer_size += len(content)
+        if self.buffer_size >= self.block_size:
+            self._write_block()
+
+    def _write_block(self):
+        if not self.buffer:
+            return
+        content = b"".join(article for _, article in self.buffer)
+        if self.index["compression"] == "zlib":
+            compressor = zlib.compressobj(zdict=self.dictionary)
+            content = compressor.compress(content) + compressor.flush()
+
+        shards = self.index["shards"]
+        if shards:
+            used = (self.folder_path / shards[-1]).stat().st_size
+        if not shards or (used > 0 and used + len(content) > self.shard_size):
+            shards.append(f"shard_{len(shards):05d}.pack")
+        with open(self.folder_path / shards[-1], "ab") as f:
+            offset = f.tell()
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        block = len(self.index["blocks"])
+        self.index["blocks"].append([len(shards) - 1, offset, len(content)])
+        start = 0
+        for name, article in self.buffer:
+            self.index["articles"].append([name, block, start, len(article)])
+            start += len(article)
+        self.buffer = []
+        self.buffer_size = 0
+
+    def close(self):
+        """Writes the last block and replaces the index."""
+        self._write_block()
+        index_path = self.folder_path / PACK_INDEX_NAME
+        tmp_path = index_path.with_name(f".{index_path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def pack_corpus(
+    folder_path,
+    out_path,
+    shard_size=1024**3,
+    block_size=65536,
+    compress=True,
+    dictionary_size=32768,
+    n_samples=1000,
+    freq=None,
+):
+    """Packs a corpus of one JSON file per article into a few large append-only shard files
+    with an offset index, so that reading it no longer costs one open and stat per article. The
+    packed corpus is read with open_corpus, with the same keys and in the same order as the
+    original folder. Packing into an existing packed corpus only appends the articles it does
+    not hold yet, and keeps the old content of articles that were edited or removed since, so
+    a changed corpus is packed into an empty folder. A corpus partitioned with
+    partition_corpus is packed partition by partition, and keeps its manifest. With freq, an
+    unzipped corpus is partitioned while it is packed, in the layout and with the manifest of
+    partition_corpus, without copying the articles into a partitioned folder first.
+
+    Args:
+        folder_path (str): The path to the unzipped or partitioned corpus.
+        out_path (str): The path to the folder where the packed corpus is stored.
+        shard_size (int): The size in bytes above which a new shard is started.
+        block_size (int): The size in bytes of the uncompressed blocks. Smaller blocks make
+            reading a single article faster and compression weaker.
+        compress (bool): Whether to compress the blocks with zlib.
+        dictionary_size (int): The size of the preset dictionary trained on the articles, 0 to
+            compress without a dictionary.
+        n_samples (int): The number of articles the dictionary is trained on.
+        freq (str, optional): The length of a partition, either "month" or "day", to
+            partition an unzipped corpus while packing it.
+
+    Returns:
+        summary (dict): The number of articles added, and the sizes of their contents before
+        and after packing, in bytes.
+
+    """
+    folder = Path(folder_path)
+    out = Path(out_path)
+    options = {
+        "shard_size": shard_size,
+        "block_size": block_size,
+        "compress": compress,
+        "dictionary_size": dictionary_size,
+        "n_samples": n_samples,
+    }
+    if (folder / MANIFEST_NAME).exists():
+        summary = {"n_articles": 0, "raw_bytes": 0, "packed_bytes": 0}
+        for partition in sorted(child for child in folder.iterdir() if child.is_dir()):
+            partition_summary = pack_corpus(partition, out / partition.name, **options)
+            for name in summary:
+                summary[name] += partition_summary[name]
+        shutil.copy2(folder / MANIFEST_NAME, out / MANIFEST_NAME)
+        return summary
+    if freq is not None:
+        check_freq(freq)
+
+    keys = FolderCorpus(folder).keys()
+    dictionaries = []
+    summary = {"n_articles": 0, "raw_bytes": 0, "packed_bytes": 0}
+    with contextlib.ExitStack() as stack:
+
+        def open_writer(path):
+            dictionary = None
+            if compress and dictionary_size and not (path / PACK_INDEX_NAME).exists():
+                if not dictionaries:
+                    step = max(len(keys) // n_samples, 1)
+                    samples = [
+                        Path(key).read_bytes() for key in keys[::step][:n_samples]
+                    ]
+                    dictionaries.append(train_dictionary(samples, dictionary_size))
+                dictionary = dictionaries[0]
+            writer = PackWriter(path, shard_size, block_size, compress, dictionary)
+            return stack.enter_context(writer)
+
+        if freq is None:
+            writers = {None: open_writer(out)}
+        else:
+            writers = {
+                child.name: open_writer(child)
+                for child in sorted(out.iterdir() if out.exists() else [])
+                if (child / PACK_INDEX_NAME).exists()
+            }
+        packed_before = sum(
+            length
+            for writer in writers.values()
+            for _, _, length in writer.index["blocks"]
+        )
+        for key in keys:
+            name = Path(key).relative_to(folder).as_posix()
+            if any(name in writer for writer in writers.values()):
+                continue
+            content = Path(key).read_bytes()
+            partition = None
+            if freq is not None:
+                partition = partition_name(parse_article(content), freq)
+                if partition not in writers:
+                    writers[partition] = open_writer(out / partition)
+            writers[partition].add(name, content)
+            summary["n_articles"] += 1
+            summary["raw_bytes"] += len(content)
+    packed_after = sum(
+        length for writer in writers.values() for _, _, length in writer.index["blocks"]
+    )
+    summary["packed_bytes"] = packed_after - packed_before
+    if freq is not None:
+        n_files = {
+            partition: len(writer.index["articles"])
+            for partition, writer in writers.items()
+        }
+        write_manifest(out, n_files, freq)
+    return summary
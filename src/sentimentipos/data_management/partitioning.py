@@ -0,0 +1,113 @@
+import json
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from sentimentipos.data_management.data_processing import (
+    MANIFEST_NAME,
+    published_date,
+    read_article,
+)
+
+PARTITION_FORMATS = {"month": "%Y-%m", "day": "%Y-%m-%d"}
+UNKNOWN_PARTITION = "unknown"
+
+
+def check_freq(freq):
+    """Checks that the length of a partition is supported.
+
+    Args:
+        freq (str): The length of a partition, either "month" or "day".
+
+    """
+    if freq not in PARTITION_FORMATS:
+        info = f"freq must be one of {list(PARTITION_FORMATS)}, got {freq!r}."
+        raise ValueError(info)
+
+
+def partition_name(data, freq):
+    """Returns the name of the partition of an article, from its publication date.
+
+    Args:
+        data (dict): The parsed article, or None if it is not valid JSON.
+        freq (str): The length of a partition, either "month" or "day".
+
+    Returns:
+        name (str): The name of the partition, UNKNOWN_PARTITION if the publication date
+        cannot be parsed.
+
+    """
+    date = None if data is None else published_date(data.get("published"))
+    if date is None:
+        return UNKNOWN_PARTITION
+    return date.strftime(PARTITION_FORMATS[freq])
+
+
+def write_manifest(out_path, n_files, freq):
+    """Writes the manifest of a partitioned corpus, with the date range of every partition.
+
+    Args:
+        out_path (pathlib.Path): The path to the folder of the partitioned corpus.
+        n_files (dict): The number of files of every partition.
+        freq (str): The length of a partition, either "month" or "day".
+
+    Returns:
+        manifest (dict): The manifest listing the name, first day, last day and number of files
+        of every partition.
+
+    """
+    partitions = []
+    for name in sorted(n_files):
+        if name == UNKNOWN_PARTITION:
+            continue
+        period = pd.Period(name, freq="M" if freq == "month" else "D")
+        partitions.append(
+            {
+                "name": name,
+                "start": period.start_time.strftime("%Y-%m-%d"),
+                "end": period.end_time.strftime("%Y-%m-%d"),
+                "n_files": n_files[name],
+            },
+        )
+    manifest = {
+        "freq": freq,
+        "partitions": partitions,
+        "n_unknown": n_files.get(UNKNOWN_PARTITION, 0),
+    }
+    out_path.mkdir(parents=True, exist_ok=True)
+    with open(out_path / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def partition_corpus(folder_path, out_path, freq="month"):
+    """Copies the articles of the unzipped corpus into one folder per publication month or day,
+    and writes a manifest with the date range of every partition. Articles whose publication
+    date cannot be parsed, and files that are not valid JSON, go to a separate partition that is
+    never searched, since filter_df_by_ipo_date drops them anyway.
+
+    Args:
+        folder_path (str): The path to the unzipped corpus.
+        out_path (str): The path to the folder where the partitioned corpus is stored.
+        freq (str): The length of a partition, either "month" or "day".
+
+    Returns:
+        manifest (dict): The manifest listing the name, first day, last day and number of files
+        of every partition.
+
+    """
+    check_freq(freq)
+    folder = Path(folder_path)
+    out = Path(out_path)
+    n_files = {}
+    for file_path in folder.rglob("*"):
+        if not file_path.is_file():
+            continue
+        name = partition_name(read_article(file_path), freq)
+        destination = out / name / file_path.relative_to(folder)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(file_path, destination)
+        n_files[name] = n_files.get(name, 0) + 1
+
+    return write_manifest(out, n_files, freq)
@@ -1,19 +1,21 @@
-import pickle
+import shutil
 from pathlib import Path
 
 import pandas as pd
 import pytask
 
-from sentimentipos.config import BLD, SRC
+from sentimentipos.config import BLD, MEMORY_BUDGET, SRC
 from sentimentipos.data_management import (
-    filter_and_store_df_by_ipo_date,
-    generate_dataframes,
+    ArticleCorpus,
+    TextSplitter,
     get_ipo_data_clean,
     get_ipo_info,
     ipo_tickers,
+    iter_dfs_filtered,
     open_excel,
-    split_text,
+    pack_corpus,
     unzipper,
+    write_dfs_filtered,
 )
 
 
@@ -45,9 +47,20 @@ def task_clean_data_excel(depends_on, produces):
 
 
 # Task 3
+@pytask.mark.depends_on(BLD / "python" / "data" / "unzipped")
+@pytask.mark.produces(BLD / "python" / "data" / "packed")
+def task_pack_corpus(depends_on, produces):
+    """Partitions the unzipped articles by month while packing them into shard files."""
+    # Packing only appends new articles, so the corpus is packed again from scratch to drop
+    # the articles that were edited or removed since the last run.
+    shutil.rmtree(produces, ignore_errors=True)
+    pack_corpus(depends_on, produces, freq="month")
+
+
+# Task 4
 @pytask.mark.depends_on(
     {
-        "unzipped": BLD / "python" / "data" / "unzipped",
+        "packed": BLD / "python" / "data" / "packed",
         "excel_path": BLD / "python" / "data" / "ipo_data_clean.xlsx",
     },
 )
@@ -63,21 +76,15 @@ def task_generate_ipo_data_and_dataframes(depends_on, produces):
     ipo_data_clean = open_excel(depends_on["excel_path"])
     ipo_info = get_ipo_info(ipo_list, ipo_data_clean)
     ipo_info.to_csv(produces["ipo_info_data"], index=False)
-    df_dict = generate_dataframes(
-        depends_on["unzipped"],
-        ipo_info,
+    corpus = ArticleCorpus(depends_on["packed"]).for_companies(ipo_info)
+    chunks = corpus.before_ipo().collect_chunks(
+        memory_budget=MEMORY_BUDGET,
+        checkpoint_dir=BLD / "python" / "data" / "ingestion_checkpoint",
     )
-    df_dict = {
-        f"df_{ipo_info.loc[ticker, 'company_name']}": df
-        for ticker, df in zip(ipo_list, df_dict.values())
-    }
-    dfs_filtered = filter_and_store_df_by_ipo_date(ipo_info, df_dict)
-    dfs_filtered = [(dfs_filtered[f"df_{ticker}"], ticker) for ticker in ipo_list]
-    with open(produces["dfs_filtered"], "wb") as f:
-        pickle.dump(dfs_filtered, f)
+    write_dfs_filtered(chunks, ipo_list, produces["dfs_filtered"])
 
 
-# Task 4
+# Task 5
 @pytask.mark.depends_on(
     {
         "dfs_filtered": BLD / "python" / "data" / "dfs_filtered.pkl",
@@ -88,9 +95,16 @@ def task_generate_ipo_data_and_dataframes(depends_on, produces):
 )
 def task_split_text_and_save(depends_on, produces):
     """Split text in dataframes, tokenize, and save to individual CSV files."""
-    dfs_filtered = pd.read_pickle(depends_on["dfs_filtered"])
     tokenized_texts_folder_path = Path(produces)
     tokenized_texts_folder_path.mkdir(parents=True, exist_ok=True)
-    for df, ticker in dfs_filtered:
-        words_df = split_text(df)  # got rid of the function argument ticker
-        words_df.to_csv(produces / f"{ticker}.csv", index=False)
+    splitters = {}
+    for ticker, df in iter_dfs_filtered(depends_on["dfs_filtered"]):
+        words_path = produces / f"{ticker}.csv"
+        if ticker not in splitters:
+            splitters[ticker] = TextSplitter()
+            pd.DataFrame(columns=["words"]).to_csv(words_path, index=False)
+        words_df = splitters[ticker].split(df)
+        words_df.to_csv(words_path, mode="a", header=False, index=False)
+    for ticker, splitter in splitters.items():
+        words_df = splitter.finish()
+        words_df.to_csv(produces / f"{ticker}.csv", mode="a", header=False, index=False)
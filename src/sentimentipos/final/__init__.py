@@ -2,6 +2,23 @@
 
 from sentimentipos.analysis.model import get_sentiment_scores, run_linear_regression
 from sentimentipos.data_management.data_processing import ipo_tickers
-from sentimentipos.final.plot import plot_regression
+from sentimentipos.final.plot import (
+    draw_regression,
+    figure_hash_path,
+    plot_regression,
+    regression_figure,
+    regression_grid,
+    render_figures,
+)
 
-__all__ = [plot_regression, run_linear_regression, get_sentiment_scores, ipo_tickers]
+__all__ = [
+    draw_regression,
+    figure_hash_path,
+    plot_regression,
+    regression_figure,
+    regression_grid,
+    render_figures,
+    run_linear_regression,
+    get_sentiment_scores,
+    ipo_tickers,
+]
@@ -1,37 +1,245 @@
+import hashlib
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import matplotlib.pyplot as plt
+import pandas as pd
 import statsmodels.api as sm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
+# Bump when the look of the figures changes, so that cached figures are rendered again.
+FIGURE_VERSION = "1"
 
-def plot_regression(X, y, model, data):
-    """Plots a linear regression model using the sentiment scores on the X axis (as
-    independent variable) and the IPO first day returns on the y axis (as the dependent
+
+def draw_regression(
+    ax,
+    X,
+    y,
+    model,
+    data,
+    title="Linear Regression Model",
+    xlabel="Sentiment Scores",
+    scale=1.0,
+):
+    """Draws a linear regression model on the given axes, with the sentiment scores on the X axis
+    (as independent variable) and the IPO first day returns on the y axis (as the dependent
     variable).
 
     Args:
+    ax (matplotlib.axes.Axes): The axes to draw on.
     X (float): the independent variable, the sentiment scores.
     y (float): The dependent variable, the first day returns.
     model (statsmodels.regression.linear_model.RegressionResultsWrapper): The linear regression model to plot.
+    data (pd.DataFrame): The IPO information, used to label each point with the company name.
+    title (str): The title of the axes.
+    xlabel (str): The label of the X axis.
+    scale (float): Factor applied to all font and marker sizes, smaller for small multiples.
 
     """
-    plt.figure(figsize=(12, 8))
-    plt.scatter(X, y, label="Data points", alpha=0.7, marker="o", s=50, edgecolors="k")
-    plt.plot(
+    ax.scatter(
+        X,
+        y,
+        label="Data points",
+        alpha=0.7,
+        marker="o",
+        s=50 * scale,
+        edgecolors="k",
+    )
+    ax.plot(
         X,
         model.predict(sm.add_constant(X)),
         color="green",
         label="Regression line",
     )
-    plt.xlabel("Sentiment Scores", fontsize=16)
-    plt.ylabel("Returns", fontsize=16)
-    plt.title("Linear Regression Model", fontsize=20)
+    ax.set_xlabel(xlabel, fontsize=16 * scale)
+    ax.set_ylabel("Returns", fontsize=16 * scale)
+    ax.set_title(title, fontsize=20 * scale)
 
     for i, company_name in enumerate(data["company_name"]):
-        plt.annotate(
+        ax.annotate(
             company_name,
             (X.iloc[i], y.iloc[i]),
             xytext=(5, 5),
             textcoords="offset points",
-            fontsize=12,
+            fontsize=12 * scale,
         )
 
-    plt.legend(fontsize=12)
+    ax.legend(fontsize=12 * scale)
+
+
+def plot_regression(X, y, model, data):
+    """Plots a linear regression model using the sentiment scores on the X axis (as
+    independent variable) and the IPO first day returns on the y axis (as the dependent
+    variable).
+
+    Args:
+    X (float): the independent variable, the sentiment scores.
+    y (float): The dependent variable, the first day returns.
+    model (statsmodels.regression.linear_model.RegressionResultsWrapper): The linear regression model to plot.
+
+    """
+    plt.figure(figsize=(12, 8))
+    draw_regression(plt.gca(), X, y, model, data)
+
+
+def _fit_spec(spec):
+    ipo_info = spec["ipo_info"].reset_index(drop=True)
+    sentiment_scores = spec["sentiment_scores"].reset_index(drop=True)
+    y = ipo_info["returns"]
+    X = sentiment_scores[spec.get("x", "Polarity")]
+    model = spec.get("model")
+    if model is None:
+        model = sm.OLS(y, sm.add_constant(X)).fit()
+    return X, y, model, ipo_info
+
+
+def regression_figure(spec):
+    """Plots the regression of the first day returns on one sentiment score on its own figure,
+    without using the global state of pyplot.
+
+    Args:
+        spec (dict): The specification of the figure, with the IPO information under
+            "ipo_info", the sentiment scores under "sentiment_scores", and optionally the
+            score to use under "x" (Polarity by default), the title under "title" and the
+            model already fitted on them under "model", which is then not fitted again.
+
+    Returns:
+        fig (matplotlib.figure.Figure): The figure, attached to a non-interactive canvas.
+
+    """
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    X, y, model, ipo_info = _fit_spec(spec)
+    title = spec.get("title", "Linear Regression Model")
+    draw_regression(ax, X, y, model, ipo_info, title)
+    return fig
+
+
+def regression_grid(specs, ncols=3):
+    """Plots the regressions of many specifications as small multiples on a single figure.
+
+    Args:
+        specs (list): The specifications of the panels, as accepted by regression_figure.
+        ncols (int): The number of panels per row.
+
+    Returns:
+        fig (matplotlib.figure.Figure): The figure, attached to a non-interactive canvas.
+
+    """
+    ncols = min(ncols, len(specs))
+    nrows = math.ceil(len(specs) / ncols)
+    fig = Figure(figsize=(5 * ncols, 4 * nrows), layout="constrained")
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(nrows, ncols, squeeze=False).flatten()
+    for ax, spec in zip(axes, specs):
+        X, y, model, ipo_info = _fit_spec(spec)
+        title = spec.get("title", X.name)
+        draw_regression(ax, X, y, model, ipo_info, title, xlabel=X.name, scale=0.6)
+    for ax in axes[len(specs) :]:
+        ax.set_axis_off()
+    return fig
+
+
+def figure_inputs_hash(spec):
+    """Computes a fingerprint of everything a figure is drawn from.
+
+    Args:
+        spec (dict): The specification of a figure or, with the panels under "panels", of a
+            grid of figures.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the inputs.
+
+    """
+    digest = hashlib.sha256(FIGURE_VERSION.encode())
+    for panel in spec.get("panels", [spec]):
+        for name in ["ipo_info", "sentiment_scores"]:
+            df = panel[name]
+            digest.update(str(list(df.columns)).encode())
+            digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+        digest.update(str(panel.get("x", "Polarity")).encode())
+        digest.update(str(panel.get("title")).encode())
+    digest.update(str(spec.get("ncols")).encode())
+    return digest.hexdigest()
+
+
+def figure_hash_path(path):
+    """Returns the path of the file storing the fingerprint of the inputs of a figure, next
+    to the figure. Tasks rendering figures declare it as a product along with the figure.
+
+    Args:
+        path (str or pathlib.Path): The path of the figure.
+
+    Returns:
+        pathlib.Path: The path of the fingerprint file.
+
+    """
+    path = Path(path)
+    return path.with_name(f"{path.name}.sha256")
+
+
+def render_figure(spec):
+    """Renders the figure of a specification and saves it to spec["path"]. A specification with
+    a list of specifications under "panels" is rendered as a grid of small multiples with
+    spec["ncols"] panels per row.
+
+    Args:
+        spec (dict): The specification of the figure.
+
+    Returns:
+        path (pathlib.Path): The path of the saved figure.
+
+    """
+    path = Path(spec["path"])
+    if "panels" in spec:
+        fig = regression_grid(spec["panels"], spec.get("ncols", 3))
+    else:
+        fig = regression_figure(spec)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(path)
+    figure_hash_path(path).write_text(figure_inputs_hash(spec))
+    return path
+
+
+def is_up_to_date(spec):
+    """Checks whether the figure of a specification was already rendered from the same inputs.
+
+    Args:
+        spec (dict): The specification of the figure.
+
+    Returns:
+        bool: True if the figure exists and its inputs have not changed.
+
+    """
+    path = Path(spec["path"])
+    hash_path = figure_hash_path(path)
+    return (
+        path.exists()
+        and hash_path.exists()
+        and hash_path.read_text() == figure_inputs_hash(spec)
+    )
+
+
+def render_figures(specs, n_workers=None):
+    """Renders a batch of figures in a pool of processes, skipping the figures whose inputs have
+    not changed since they were last rendered.
+
+    Args:
+        specs (list): The specifications of the figures, as accepted by render_figure.
+        n_workers (int, optional): The number of processes. Defaults to the number of CPUs.
+
+    Returns:
+        rendered (list): The paths of the figures that were rendered.
+
+    """
+    outdated = [spec for spec in specs if not is_up_to_date(spec)]
+    if not outdated:
+        return []
+    if n_workers == 1 or len(outdated) == 1:
+        return [render_figure(spec) for spec in outdated]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        rendered = list(executor.map(render_figure, outdated))
+    return rendered
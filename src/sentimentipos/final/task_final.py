@@ -1,10 +1,18 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 import pytask
 
 from sentimentipos.analysis import run_linear_regression
 from sentimentipos.config import BLD
-from sentimentipos.final import plot_regression
+from sentimentipos.final import figure_hash_path, regression_figure, render_figures
+
+SCORE_COLUMNS = ["Positive", "Negative", "Polarity", "Subjectivity"]
+SCORE_FIGURES = {
+    **{
+        column: BLD / "python" / "figures" / f"regression_{column.lower()}.png"
+        for column in SCORE_COLUMNS
+    },
+    "grid": BLD / "python" / "figures" / "regression_grid.png",
+}
 
 
 @pytask.mark.depends_on(
@@ -21,14 +29,47 @@ from sentimentipos.final import plot_regression
 )
 def task_regression_figure_table(depends_on, produces):
     """Saves regression summary table as a LaTeX file and plots the model."""
-    sentiment_scores = pd.read_csv(depends_on["models"])
-    ipo_info = pd.read_csv(depends_on["ipo_info_data"])
+    sentiment_scores = pd.read_csv(depends_on["models"], float_precision="round_trip")
+    ipo_info = pd.read_csv(depends_on["ipo_info_data"], float_precision="round_trip")
     model = run_linear_regression(ipo_info, sentiment_scores)
-    y = ipo_info["returns"]
-    X = sentiment_scores["Polarity"]
-    plot_regression(X, y, model, ipo_info)
-    plt.savefig(produces["figures"])
+    fig = regression_figure(
+        {"ipo_info": ipo_info, "sentiment_scores": sentiment_scores, "model": model},
+    )
+    fig.savefig(produces["figures"])
 
     summary_table = model.summary()
     with open(produces["tables"] / "summary_table.tex", "w") as f:
         f.write(summary_table.as_latex())
+
+
+@pytask.mark.depends_on(
+    {
+        "models": BLD / "python" / "models" / "sentiment_scores.csv",
+        "ipo_info_data": BLD / "python" / "data" / "ipo_info.csv",
+    },
+)
+@pytask.mark.produces(
+    {
+        **SCORE_FIGURES,
+        **{
+            f"{name}_hash": figure_hash_path(path)
+            for name, path in SCORE_FIGURES.items()
+        },
+    },
+)
+def task_score_figures(depends_on, produces):
+    """Plots the regression of returns on each sentiment score, alone and as a grid."""
+    sentiment_scores = pd.read_csv(depends_on["models"], float_precision="round_trip")
+    ipo_info = pd.read_csv(depends_on["ipo_info_data"], float_precision="round_trip")
+    specs = [
+        {
+            "path": produces[column],
+            "ipo_info": ipo_info,
+            "sentiment_scores": sentiment_scores,
+            "x": column,
+            "title": f"Returns on {column}",
+        }
+        for column in SCORE_COLUMNS
+    ]
+    specs.append({"path": produces["grid"], "panels": list(specs), "ncols": 2})
+    render_figures(specs)
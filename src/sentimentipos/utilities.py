@@ -1,5 +1,10 @@
 """Utilities used in various parts of the project."""
 
+import gc
+import os
+import resource
+import sys
+
 import yaml
 
 
@@ -23,3 +28,105 @@ def read_yaml(path):
             )
             raise ValueError(info) from error
     return out
+
+
+MEMORY_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_memory_size(size):
+    """Parse a memory size such as "512M", "4G" or a number of bytes.
+
+    Args:
+        size (str or int): The memory size, with an optional K, M, G or T suffix.
+
+    Returns:
+        int: The size in bytes.
+
+    """
+    if isinstance(size, int):
+        return size
+    text = str(size).strip().upper().removesuffix("B").removesuffix("I")
+    unit = text[-1:] if text[-1:] in MEMORY_UNITS else ""
+    try:
+        value = float(text.removesuffix(unit) if unit else text)
+    except ValueError as error:
+        info = (
+            f"Could not parse the memory size {size!r}, expected e.g. '512M' or '4G'."
+        )
+        raise ValueError(info) from error
+    return int(value * MEMORY_UNITS[unit])
+
+
+def current_rss():
+    """Measure the resident memory of the current process.
+
+    Returns:
+        int: The resident set size in bytes. Where /proc is not available, the peak resident
+            set size is returned instead.
+
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class AdaptiveBatchSize:
+    """Batch size that adapts to the measured memory of the process. After each batch, the size
+    is halved while the resident memory is above the high watermark of the budget and doubled
+    while it is below the low watermark, so that a run slows down instead of running out of
+    memory. Without a budget the size stays fixed.
+
+    Args:
+        memory_budget (int or str, optional): The memory budget, see parse_memory_size.
+        initial (int): The first batch size.
+        minimum (int): The smallest batch size.
+        maximum (int): The largest batch size.
+        low (float): The low watermark, as a share of the budget.
+        high (float): The high watermark, as a share of the budget.
+
+    """
+
+    def __init__(
+        self,
+        memory_budget=None,
+        initial=1000,
+        minimum=1,
+        maximum=100000,
+        low=0.5,
+        high=0.8,
+    ):
+        self.memory_budget = (
+            None if memory_budget is None else parse_memory_size(memory_budget)
+        )
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.low = low
+        self.high = high
+
+    def under_pressure(self):
+        """Whether the resident memory is above the high watermark of the budget."""
+        if self.memory_budget is None:
+            return False
+        return current_rss() > self.high * self.memory_budget
+
+    def update(self):
+        """Adapt the batch size to the current resident memory.
+
+        Returns:
+            int: The size of the next batch.
+
+        """
+        if self.memory_budget is None:
+            return self.size
+        rss = current_rss()
+        if rss > self.high * self.memory_budget:
+            gc.collect()
+            self.size = max(self.minimum, self.size // 2)
+        elif rss < self.low * self.memory_budget:
+            self.size = min(self.maximum, self.size * 2)
+        return self.size
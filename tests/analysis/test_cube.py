@@ -0,0 +1,147 @@
+"""Tests for the sentiment cube."""
+import numpy as np
+import pandas as pd
+import pytest
+from sentimentipos.analysis.cube import (
+    SentimentCube,
+    build_sentiment_cube,
+    ipo_windows,
+    window_sentiment_scores,
+)
+from sentimentipos.analysis.model import (
+    HEADER_WORDS,
+    get_term_counts,
+    run_linear_regression,
+    scores_from_counts,
+)
+from sentimentipos.data_management.data_processing import split_text, tokenize_text
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(
+        ["2018-03-01", "2018-04-15", "2018-05-01"], returns=[0.1, -0.2, 0.3]
+    )
+
+
+@pytest.fixture()
+def dfs():
+    rng = np.random.default_rng(2)
+    vocabulary = np.array(["gain", "loss", "other"])
+    dfs = {}
+    for ticker in ["A", "B", "C"]:
+        n_articles = 60
+        published = pd.to_datetime("2017-12-01") + pd.to_timedelta(
+            rng.integers(0, 150, n_articles),
+            unit="D",
+        )
+        published = list(published.strftime("%Y-%m-%dT%H:%M:%S+00:00"))
+        published[-1] = "not a date"
+        dfs[ticker] = pd.DataFrame(
+            {
+                "published": published,
+                "text": [
+                    " ".join(rng.choice(vocabulary, size=10)) for _ in range(n_articles)
+                ],
+            },
+        )
+    return dfs
+
+
+def brute_force_scores(df, lm, start, end):
+    published = pd.to_datetime(df["published"], errors="coerce", utc=True)
+    published = published.dt.tz_convert(None).dt.normalize()
+    mask = published < pd.Timestamp(end)
+    if not pd.isna(start):
+        mask &= published >= pd.Timestamp(start)
+    texts = df.loc[mask, "text"]
+    counts = get_term_counts([tokenize_text(text) for text in texts], lm)
+    return scores_from_counts(counts.sum().to_frame().T).iloc[0]
+
+
+def test_window_scores_match_brute_force(dfs, ipo_info, lm):
+    cube = build_sentiment_cube(dfs, lm)
+    windows = ipo_windows(ipo_info, [7, 30, None])
+    df_scores = cube.window_scores(windows)
+
+    assert len(df_scores) == 9
+    for _, row in df_scores.iterrows():
+        expected = brute_force_scores(dfs[row["ticker"]], lm, row["start"], row["end"])
+        assert row["Positive"] == expected["Positive"]
+        assert row["Negative"] == expected["Negative"]
+        assert row["Polarity"] == pytest.approx(expected["Polarity"])
+        assert row["Subjectivity"] == pytest.approx(expected["Subjectivity"])
+
+
+def test_cube_with_a_company_without_articles(dfs, ipo_info, lm):
+    dfs["C"] = dfs["C"].iloc[:0]
+    cube = build_sentiment_cube(iter(dfs.items()), lm)
+    scores = window_sentiment_scores(cube, ipo_info, [30, None])
+
+    assert cube.tickers == ["A", "B", "C"]
+    assert (cube.cumulative[2] == 0).all()
+    for window in ["30d", "all"]:
+        assert scores[window].loc["C"].tolist() == [0, 0, 0, 0]
+    expected = brute_force_scores(dfs["A"], lm, None, "2018-03-01")
+    assert scores["all"].loc["A", "Positive"] == expected["Positive"]
+
+
+def test_cube_without_articles(lm):
+    cube = build_sentiment_cube({}, lm)
+
+    assert cube.tickers == []
+    assert cube.n_days == 0
+
+
+def test_window_outside_cube_is_empty(dfs, lm):
+    cube = build_sentiment_cube(dfs, lm)
+    counts = cube.window_counts(
+        ["A", "B"],
+        ["2010-01-01", "2030-01-01"],
+        ["2011-01-01", None],
+    )
+    assert (counts.to_numpy() == 0).all()
+
+
+def test_save_and_load(dfs, tmp_path, lm):
+    cube = build_sentiment_cube(dfs, lm)
+    cube.save(tmp_path / "cube.npz")
+    loaded = SentimentCube.load(tmp_path / "cube.npz")
+
+    assert loaded.tickers == cube.tickers
+    assert loaded.start == cube.start
+    np.testing.assert_array_equal(loaded.cumulative, cube.cumulative)
+
+
+def test_window_sentiment_scores_feed_regression(dfs, ipo_info, lm):
+    cube = build_sentiment_cube(dfs, lm)
+    scores = window_sentiment_scores(cube, ipo_info, [30, 90, None])
+
+    assert list(scores) == ["30d", "90d", "all"]
+    for sentiment_scores in scores.values():
+        assert list(sentiment_scores.index) == ["A", "B", "C"]
+        model = run_linear_regression(ipo_info.copy(), sentiment_scores.copy())
+        assert model.params.size == 2
+
+
+def test_all_window_differs_from_build_by_merged_words(ipo_info, lm):
+    texts = ["gain other gain", "other loss gain", "gain", "loss other"]
+    df = pd.DataFrame({"published": "2018-01-10T12:00:00+00:00", "text": texts})
+    cube = build_sentiment_cube({"A": df}, lm)
+    counts = cube.window_counts(["A"], [None], ["2018-03-01"]).iloc[0]
+    build_words = [*HEADER_WORDS, *split_text(df)["words"]]
+    build_counts = get_term_counts([build_words], lm).iloc[0]
+
+    # The build counts the header, and each of the three joins merges two words.
+    assert build_words == [
+        "words",
+        "gain",
+        "other",
+        "gain,other",
+        "loss",
+        "gain,gain,loss",
+        "other",
+    ]
+    assert counts["Tokens"] == build_counts["Tokens"] - 1 + 3
+    assert counts["Positive"] == build_counts["Positive"] + 3
+    assert counts["Negative"] == build_counts["Negative"] + 1
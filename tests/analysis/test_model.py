@@ -1,7 +1,13 @@
 import numpy as np
 import pandas as pd
+import pysentiment2 as ps
 import pytest
-from sentimentipos.analysis.model import get_sentiment_scores, run_linear_regression
+from sentimentipos.analysis.model import (
+    get_sentiment_scores,
+    get_term_counts,
+    run_linear_regression,
+    scores_from_counts,
+)
 from statsmodels import api as sm
 
 
@@ -53,3 +59,38 @@ class TestLanguageModel:
             result,
             sm.regression.linear_model.RegressionResultsWrapper,
         ), "The result should be an instance of statsmodels.regression.linear_model.RegressionResultsWrapper."
+
+
+def test_get_term_counts_and_scores_from_counts(lm):
+    articles_words = [["gain", "loss", "gain", "other"], [], ["loss"]]
+    counts = get_term_counts(articles_words, lm)
+    expected_counts = pd.DataFrame(
+        {"Positive": [2.0, 0.0, 0.0], "Negative": [1.0, 0.0, 1.0], "Tokens": [4, 0, 1]},
+    )
+    pd.testing.assert_frame_equal(counts, expected_counts)
+    pd.testing.assert_frame_equal(
+        get_term_counts([], lm),
+        expected_counts.iloc[:0],
+        check_index_type=False,
+    )
+
+    scores = scores_from_counts(counts)
+    assert scores.loc[0, "Polarity"] == pytest.approx(1 / 3)
+    assert scores.loc[0, "Subjectivity"] == pytest.approx(3 / 4)
+    assert scores.loc[1, "Polarity"] == 0
+    assert scores.loc[2, "Polarity"] == pytest.approx(-1)
+
+
+@pytest.mark.parametrize("memory_budget", ["64T", "1K"])
+def test_get_sentiment_scores_in_chunks(tmp_path, memory_budget):
+    lm = ps.LM()
+    vocabulary = ["good", "strong", "loss", "decline", "NA", "2018", "the", "market"]
+    rng = np.random.default_rng(0)
+    for ticker in ["A", "B"]:
+        words = rng.choice(vocabulary, size=300)
+        pd.DataFrame({"words": words}).to_csv(tmp_path / f"{ticker}.csv", index=False)
+    pd.DataFrame(columns=["words"]).to_csv(tmp_path / "C.csv", index=False)
+
+    expected = get_sentiment_scores(["A", "B", "C"], lm, tmp_path)
+    result = get_sentiment_scores(["A", "B", "C"], lm, tmp_path, memory_budget)
+    pd.testing.assert_frame_equal(result, expected)
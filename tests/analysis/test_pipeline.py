@@ -0,0 +1,158 @@
+"""Tests for the fused in-memory pipeline."""
+
+import pandas as pd
+import pysentiment2 as ps
+import pytest
+from pandas.testing import assert_frame_equal
+from sentimentipos.analysis import task_analysis
+from sentimentipos.analysis.pipeline import PIPELINE_OUTPUTS, run_fused_pipeline
+from sentimentipos.config import SRC
+from sentimentipos.data_management import read_dfs_filtered, task_data_management
+from sentimentipos.final import task_final
+
+EXCEL_PATH = SRC / "data" / "original_ipo_data.xlsx"
+COMPANIES = ["Carbon Black", "Spotify", "AXA", "Smartsheet", "Dropbox"]
+TEXTS = [
+    "Strong gains and record growth, analysts are optimistic.",
+    "Losses widened; the decline worried investors. NA null",
+    "The roadshow was a success despite the adverse weather.",
+]
+
+
+@pytest.fixture()
+def corpus(write_corpus):
+    articles = []
+    for i in range(40):
+        company = COMPANIES[i % len(COMPANIES)]
+        article = {
+            "title": f"{company} prepares its listing",
+            "published": f"2018-0{1 + i % 6}-{1 + i % 28:02d}T09:30:00.000+00:00",
+            "text": f"{company}: {TEXTS[i % len(TEXTS)]}",
+            "thread": {"site": "example.com"},
+        }
+        articles.append(article)
+    return write_corpus(articles, n_parts=4)
+
+
+def run_build(corpus, bld, monkeypatch, memory_budget=None):
+    monkeypatch.setattr(task_data_management, "BLD", bld.parent)
+    monkeypatch.setattr(task_data_management, "MEMORY_BUDGET", memory_budget)
+    monkeypatch.setattr(task_analysis, "MEMORY_BUDGET", memory_budget)
+    data = bld / "data"
+    data.mkdir(parents=True)
+    for folder in ["models", "tables", "figures"]:
+        (bld / folder).mkdir()
+    task_data_management.task_clean_data_excel(EXCEL_PATH, data / "ipo_data_clean.xlsx")
+    task_data_management.task_pack_corpus(corpus, data / "packed")
+    task_data_management.task_generate_ipo_data_and_dataframes(
+        {"packed": data / "packed", "excel_path": data / "ipo_data_clean.xlsx"},
+        {
+            "ipo_info_data": data / "ipo_info.csv",
+            "dfs_filtered": data / "dfs_filtered.pkl",
+        },
+    )
+    task_data_management.task_split_text_and_save(
+        {"dfs_filtered": data / "dfs_filtered.pkl"},
+        data / "tokenized_texts",
+    )
+    task_analysis.task_get_sentiment_scores(
+        data / "tokenized_texts",
+        bld / "models" / "sentiment_scores.csv",
+    )
+    task_final.task_regression_figure_table(
+        {
+            "models": bld / "models" / "sentiment_scores.csv",
+            "ipo_info_data": data / "ipo_info.csv",
+        },
+        {"figures": bld / "figures" / "regression_plot.png", "tables": bld / "tables"},
+    )
+
+
+def without_timestamp(tex):
+    return [
+        line for line in tex.splitlines() if "Date:" not in line and "Time:" not in line
+    ]
+
+
+def test_fused_pipeline_matches_pytask_build(corpus, tmp_path, monkeypatch):
+    bld = tmp_path / "bld" / "python"
+    run_build(corpus, bld, monkeypatch)
+    results = run_fused_pipeline(EXCEL_PATH, bld / "data" / "packed", lm=ps.LM())
+
+    build_scores = pd.read_csv(bld / "models" / "sentiment_scores.csv", index_col=0)
+    assert (build_scores["Positive"] > 0).any()
+    assert_frame_equal(results["sentiment_scores"], build_scores)
+    assert_frame_equal(
+        results["ipo_info"].reset_index(drop=True),
+        pd.read_csv(bld / "data" / "ipo_info.csv"),
+    )
+    for (df, ticker), (build_df, build_ticker) in zip(
+        results["dfs_filtered"],
+        read_dfs_filtered(bld / "data" / "dfs_filtered.pkl"),
+    ):
+        assert ticker == build_ticker
+        assert_frame_equal(df, build_df)
+
+    build_table = (bld / "tables" / "summary_table.tex").read_text()
+    table = results["model"].summary().as_latex()
+    assert without_timestamp(table) == without_timestamp(build_table)
+
+
+def test_scores_do_not_depend_on_corpus_layout(corpus, tmp_path, monkeypatch):
+    bld = tmp_path / "bld" / "python"
+    run_build(corpus, bld, monkeypatch)
+    results = run_fused_pipeline(EXCEL_PATH, corpus, lm=ps.LM())
+    build_scores = pd.read_csv(bld / "models" / "sentiment_scores.csv", index_col=0)
+    assert_frame_equal(results["sentiment_scores"], build_scores)
+
+
+@pytest.mark.parametrize("memory_budget", [None, "1K"])
+def test_fused_pipeline_writes_same_files(corpus, tmp_path, monkeypatch, memory_budget):
+    bld = tmp_path / "bld" / "python"
+    run_build(corpus, bld, monkeypatch, memory_budget)
+    out_dir = tmp_path / "fused"
+    run_fused_pipeline(
+        EXCEL_PATH,
+        bld / "data" / "packed",
+        lm=ps.LM(),
+        out_dir=out_dir,
+    )
+
+    for name in ["ipo_info", "sentiment_scores"]:
+        path = PIPELINE_OUTPUTS[name]
+        assert (out_dir / path).read_bytes() == (bld / path).read_bytes()
+    for words_file in (bld / "data" / "tokenized_texts").iterdir():
+        fused_file = out_dir / PIPELINE_OUTPUTS["tokenized_texts"] / words_file.name
+        assert fused_file.read_bytes() == words_file.read_bytes()
+    assert (out_dir / PIPELINE_OUTPUTS["regression_plot"]).exists()
+    assert (out_dir / PIPELINE_OUTPUTS["summary_table"]).exists()
+
+
+def test_fused_pipeline_writes_only_requested_outputs(corpus, tmp_path):
+    out_dir = tmp_path / "fused"
+    run_fused_pipeline(
+        EXCEL_PATH,
+        corpus,
+        lm=ps.LM(),
+        out_dir=out_dir,
+        outputs=["sentiment_scores"],
+    )
+    files = [path for path in out_dir.rglob("*") if path.is_file()]
+    assert files == [out_dir / PIPELINE_OUTPUTS["sentiment_scores"]]
+
+
+def test_fused_pipeline_writes_nothing_by_default(corpus, tmp_path):
+    before = sorted(tmp_path.rglob("*"))
+    run_fused_pipeline(EXCEL_PATH, corpus, lm=ps.LM())
+    assert sorted(tmp_path.rglob("*")) == before
+
+
+def test_unknown_output_raises(corpus, tmp_path):
+    with pytest.raises(ValueError, match="Unknown outputs"):
+        run_fused_pipeline(
+            EXCEL_PATH,
+            corpus,
+            lm=ps.LM(),
+            out_dir=tmp_path / "fused",
+            outputs=["plots"],
+        )
@@ -0,0 +1,153 @@
+"""Tests for the progressive sampling mode."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sentimentipos.analysis.model import get_term_counts, scores_from_counts
+from sentimentipos.analysis.progressive import (
+    RatioEstimate,
+    progressive_corpus_sentiment,
+    progressive_sentiment,
+    stratified_order,
+)
+from sentimentipos.data_management.corpus import ArticleCorpus
+from sentimentipos.data_management.data_processing import tokenize_text
+
+
+@pytest.fixture()
+def dfs():
+    rng = np.random.default_rng(1)
+    vocabulary = np.array(["gain", "loss", "other", "words"])
+    dfs = {}
+    for ticker, n_articles in [("A", 300), ("B", 40)]:
+        texts = [
+            " ".join(rng.choice(vocabulary, size=20, p=[0.2, 0.1, 0.4, 0.3]))
+            for _ in range(n_articles)
+        ]
+        published = pd.date_range("2018-01-01", periods=n_articles, freq="6H")
+        dfs[ticker] = pd.DataFrame(
+            {"published": published.astype(str), "text": texts},
+        )
+    return dfs
+
+
+def test_stratified_order_spreads_over_months():
+    published = pd.Series(["2018-01-10"] * 50 + ["2018-02-10"] * 50 + ["bad"] * 10)
+    order = stratified_order(published, seed=3)
+
+    assert sorted(order) == list(range(110))
+    first = order[:22]
+    assert 8 <= (first < 50).sum() <= 12
+    assert 8 <= ((first >= 50) & (first < 100)).sum() <= 12
+
+
+def test_ratio_estimate_is_exact_on_full_population():
+    estimate = RatioEstimate(population=4)
+    estimate.update([2, 4], [1, 3])
+    assert np.isfinite(estimate.half_width())
+    assert estimate.half_width() > 0
+    estimate.update([1, 3], [0, 1])
+    assert estimate.estimate() == pytest.approx(5 / 10)
+    assert estimate.half_width() == 0
+
+
+def test_progressive_sentiment_converges_to_full_scores(dfs, lm):
+    snapshots = list(progressive_sentiment(dfs, lm, batch_size=25))
+    final = snapshots[-1]
+
+    for ticker, df in dfs.items():
+        counts = get_term_counts([tokenize_text(text) for text in df["text"]], lm)
+        expected = scores_from_counts(counts.sum().to_frame().T).iloc[0]
+        assert final.loc[ticker, "Polarity"] == pytest.approx(expected["Polarity"])
+        assert final.loc[ticker, "Subjectivity"] == pytest.approx(
+            expected["Subjectivity"],
+        )
+        assert final.loc[ticker, "Polarity_lower"] == final.loc[ticker, "Polarity"]
+        assert final.loc[ticker, "Articles"] == len(df)
+    assert snapshots[0].loc["A", "Articles"] == 25
+    widths = [
+        snapshot.loc["A", "Polarity_upper"] - snapshot.loc["A", "Polarity_lower"]
+        for snapshot in snapshots
+    ]
+    assert widths[-1] < widths[1] < widths[0]
+
+
+def test_progressive_sentiment_stops_at_target_precision(dfs, lm):
+    snapshots = list(
+        progressive_sentiment(
+            dfs,
+            lm,
+            batch_size=20,
+            target_half_width=0.1,
+        ),
+    )
+    final = snapshots[-1]
+
+    assert final["Done"].all()
+    assert final.loc["A", "Articles"] < 300
+    half_width = (
+        final.loc["A", "Polarity_upper"] - final.loc["A", "Polarity_lower"]
+    ) / 2
+    assert half_width <= 0.1
+
+
+@pytest.fixture()
+def corpus(tmp_path, dfs):
+    folder = tmp_path / "unzipped"
+    folder.mkdir()
+    for ticker, df in dfs.items():
+        for i, article in enumerate(df.to_dict("records")):
+            article["title"] = f"Company {ticker} news"
+            with open(folder / f"{ticker}_{i}.json", "w") as f:
+                json.dump(article, f)
+    for i in range(60):
+        with open(folder / f"other_{i}.json", "w") as f:
+            json.dump({"title": "Other news", "text": "gain"}, f)
+    return folder
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(["2019-01-01", "2019-01-01"])
+
+
+def test_progressive_corpus_sentiment_samples_files_lazily(corpus, ipo_info, dfs, lm):
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo()
+    estimates = progressive_corpus_sentiment(query, lm, batch_size=50)
+    first = next(estimates)
+    snapshots = [first, *estimates]
+    final = snapshots[-1]
+
+    assert len(snapshots) == 8
+    assert 0 < first.loc["A", "Articles"] < 50
+    assert not first["Done"].any()
+    for ticker, df in dfs.items():
+        counts = get_term_counts([tokenize_text(text) for text in df["text"]], lm)
+        expected = scores_from_counts(counts.sum().to_frame().T).iloc[0]
+        assert final.loc[ticker, "Polarity"] == pytest.approx(expected["Polarity"])
+        assert final.loc[ticker, "Subjectivity"] == pytest.approx(
+            expected["Subjectivity"],
+        )
+        assert final.loc[ticker, "Articles"] == final.loc[ticker, "Total"] == len(df)
+        assert final.loc[ticker, "Polarity_lower"] == final.loc[ticker, "Polarity"]
+
+
+def test_progressive_corpus_sentiment_stops_at_target_precision(corpus, ipo_info, lm):
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo()
+    snapshots = list(
+        progressive_corpus_sentiment(
+            query,
+            lm,
+            batch_size=20,
+            target_half_width=0.2,
+        ),
+    )
+    final = snapshots[-1]
+
+    assert final["Done"].all()
+    assert len(snapshots) < 20
+    half_width = (
+        final.loc["A", "Polarity_upper"] - final.loc["A", "Polarity_lower"]
+    ) / 2
+    assert half_width <= 0.2
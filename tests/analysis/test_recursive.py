@@ -0,0 +1,75 @@
+"""Tests for the recursive least squares regression."""
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from sentimentipos.analysis.recursive import (
+    RecursiveLeastSquares,
+    coefficient_path,
+    regression_path,
+)
+
+
+@pytest.fixture()
+def data():
+    rng = np.random.default_rng(4)
+    X = pd.DataFrame({"const": 1.0, "a": rng.normal(size=40), "b": rng.normal(size=40)})
+    y = 0.5 + 2 * X["a"] - X["b"] + rng.normal(scale=0.3, size=40)
+    return X, y
+
+
+def test_update_and_downdate_match_statsmodels(data):
+    X, y = data
+    rls = RecursiveLeastSquares(3)
+    for t in range(30):
+        rls.update(X.iloc[t], y.iloc[t])
+    for t in range(10):
+        rls.downdate(X.iloc[t], y.iloc[t])
+    expected = sm.OLS(y.iloc[10:30], X.iloc[10:30]).fit()
+
+    np.testing.assert_allclose(rls.params, expected.params, rtol=1e-8)
+    np.testing.assert_allclose(rls.cov_params(), expected.cov_params(), rtol=1e-8)
+    assert rls.ssr == pytest.approx(expected.ssr)
+
+
+@pytest.mark.parametrize("window", [None, 8])
+def test_coefficient_path_matches_statsmodels(data, window):
+    X, y = data
+    path = coefficient_path(X, y, window)
+
+    assert path.iloc[:2][["const", "a", "b"]].isna().all().all()
+    for t in range(4, 40):
+        start = 0 if window is None else max(0, t + 1 - window)
+        expected = sm.OLS(y.iloc[start : t + 1], X.iloc[start : t + 1]).fit()
+        np.testing.assert_allclose(path.iloc[t][["const", "a", "b"]], expected.params)
+        np.testing.assert_allclose(
+            path.iloc[t][["const_se", "a_se", "b_se"]],
+            expected.bse,
+            rtol=1e-6,
+        )
+        assert path.iloc[t]["n_obs"] == t + 1 - start
+
+
+def test_regression_path_follows_ipo_dates():
+    ipo_info = pd.DataFrame(
+        {
+            "ticker": ["A", "B", "C", "D", "E"],
+            "ipo_date": [
+                "2018-05-01",
+                "2018-01-01",
+                "2018-03-01",
+                "2018-02-01",
+                "2018-04-01",
+            ],
+            "returns": [0.3, -0.1, 0.2, 0.05, 0.1],
+        },
+    )
+    sentiment_scores = pd.DataFrame({"Polarity": [0.9, -0.5, 0.4, 0.1, 0.2]})
+    path = regression_path(ipo_info, sentiment_scores)
+
+    assert list(path.index) == ["B", "D", "C", "E", "A"]
+    expected = sm.OLS(
+        ipo_info["returns"],
+        sm.add_constant(sentiment_scores["Polarity"]),
+    ).fit()
+    np.testing.assert_allclose(path.iloc[-1][["const", "Polarity"]], expected.params)
@@ -0,0 +1,139 @@
+"""Tests for the scoring service."""
+import json
+import threading
+import urllib.error
+
+import pytest
+from sentimentipos.analysis.service import (
+    MicroBatcher,
+    ScoringService,
+    make_server,
+    score_remote,
+)
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(["2020-01-15", "2020-02-15"])
+
+
+@pytest.fixture()
+def service(ipo_info, lm):
+    service = ScoringService(lm, ipo_info, max_wait=0.05)
+    service.start()
+    yield service
+    service.stop()
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    batch_sizes = []
+
+    def score_batch(articles):
+        batch_sizes.append(len(articles))
+        return [article * 2 for article in articles]
+
+    batcher = MicroBatcher(score_batch, max_batch_size=10, max_wait=0.2)
+    futures = [batcher.submit([i, i + 1]) for i in range(3)]
+    batcher.start()
+    results = [future.result(timeout=5) for future in futures]
+    batcher.stop()
+
+    assert results == [[0, 2], [2, 4], [4, 6]]
+    assert batch_sizes == [6]
+
+
+def test_micro_batcher_keeps_failures_to_their_request():
+    def score_batch(articles):
+        if None in articles:
+            raise TypeError("cannot score None")
+        return [article * 2 for article in articles]
+
+    batcher = MicroBatcher(score_batch, max_batch_size=10, max_wait=0.2)
+    good = batcher.submit([1, 2])
+    bad = batcher.submit([None])
+    batcher.start()
+    result = good.result(timeout=5)
+    with pytest.raises(TypeError, match="None"):
+        bad.result(timeout=5)
+    batcher.stop()
+
+    assert result == [2, 4]
+
+
+@pytest.mark.parametrize("articles", [[], [{"title": "Unrelated", "text": "gain"}]])
+def test_score_without_matching_articles(service, articles):
+    response = service.score(articles)
+
+    assert response["tickers"] == {}
+    assert len(response["articles"]) == len(articles)
+
+
+def test_score_rejects_malformed_articles(service):
+    with pytest.raises(ValueError, match="'title' of article 1"):
+        service.score([{"title": "Company A"}, {"title": 5, "text": "gain"}])
+    with pytest.raises(ValueError, match="JSON object"):
+        service.score(["Company A"])
+
+
+def test_score_per_article_and_ticker(service):
+    articles = [
+        {"title": "Company A beats estimates", "text": "gain, gain and loss."},
+        {"title": "Company B and Company A", "text": "loss"},
+        {"title": "Unrelated", "text": "gain"},
+    ]
+    response = service.score(articles)
+
+    assert [result["tickers"] for result in response["articles"]] == [
+        ["A"],
+        ["A", "B"],
+        [],
+    ]
+    assert response["articles"][0]["Positive"] == 2
+    assert response["articles"][0]["Tokens"] == 4
+    assert response["tickers"]["A"]["Positive"] == 2
+    assert response["tickers"]["A"]["Negative"] == 2
+    assert response["tickers"]["A"]["articles"] == 2
+    assert response["tickers"]["B"]["Polarity"] == pytest.approx(-1, abs=1e-5)
+    assert set(response["tickers"]) == {"A", "B"}
+
+
+def test_http_client_round_trip(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        response = score_remote(url, [{"title": "Company B", "text": "gain gain"}])
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response["tickers"]["B"]["Positive"] == 2
+    assert response["tickers"]["B"]["company_name"] == "Company B"
+
+
+def test_http_malformed_article_only_fails_its_request(service):
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    errors = []
+
+    def send_malformed():
+        try:
+            score_remote(url, [{"title": 5, "text": "gain"}])
+        except urllib.error.HTTPError as error:
+            errors.append((error.code, json.load(error)))
+
+    try:
+        malformed = threading.Thread(target=send_malformed)
+        malformed.start()
+        response = score_remote(url, [{"title": "Company A", "text": "gain"}])
+        malformed.join()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response["tickers"]["A"]["Positive"] == 1
+    assert errors[0][0] == 400
+    assert "'title'" in errors[0][1]["error"]
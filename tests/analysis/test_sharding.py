@@ -0,0 +1,137 @@
+"""Tests for the sharded execution mode."""
+
+import pandas as pd
+import pysentiment2 as ps
+import pytest
+from sentimentipos.analysis.model import get_sentiment_scores, run_linear_regression
+from sentimentipos.analysis.sharding import (
+    map_shard,
+    reduce_shards,
+    run_sharded,
+    shard_files,
+)
+from sentimentipos.data_management.corpus import ArticleCorpus
+from sentimentipos.data_management.data_processing import split_text
+from sentimentipos.data_management.packing import pack_corpus
+from sentimentipos.data_management.partitioning import partition_corpus
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(
+        ["2018-03-01", "2018-04-01", "2018-05-01"], returns=[0.1, -0.2, 0.3]
+    )
+
+
+@pytest.fixture()
+def corpus(write_corpus):
+    texts = [
+        "gain better loss",
+        " loss",
+        "gain ",
+        "benefit, loss decline",
+        "",
+        "nothing",
+    ]
+    articles = []
+    for i in range(20):
+        company = ["Company A", "Company B", "Company C"][i % 3]
+        article = {
+            "title": f"{company} news {i}",
+            "published": f"2018-0{1 + i % 4}-15T12:00:00.000+00:00",
+            "text": texts[i % len(texts)],
+        }
+        articles.append(article)
+    return write_corpus(articles, broken=True)
+
+
+@pytest.mark.parametrize("by", ["hash", "range"])
+def test_shard_files_partition_the_corpus(corpus, by):
+    shards = [shard_files(corpus, 4, shard_id, by) for shard_id in range(4)]
+    all_files = sorted(file for shard in shards for file in shard)
+    assert all_files == shard_files(corpus, 1, 0, by)
+    assert len(all_files) == len(set(all_files)) == 21
+
+
+def test_shard_files_rejects_unknown_mode(corpus):
+    with pytest.raises(ValueError, match="by"):
+        shard_files(corpus, 2, 0, by="size")
+
+
+@pytest.mark.parametrize("by", ["hash", "range"])
+def test_run_sharded_matches_single_shard(corpus, ipo_info, by, lm):
+    expected_scores, expected_articles = reduce_shards(
+        [map_shard(corpus, ipo_info, lm)],
+        ipo_info,
+        lm,
+    )
+    sentiment_scores, article_scores = run_sharded(
+        corpus,
+        ipo_info,
+        lm,
+        n_shards=3,
+        by=by,
+        n_workers=2,
+    )
+
+    pd.testing.assert_frame_equal(sentiment_scores, expected_scores)
+    pd.testing.assert_frame_equal(article_scores, expected_articles)
+    assert list(sentiment_scores.index) == ["A", "B", "C"]
+    assert list(sentiment_scores.columns) == [
+        "Positive",
+        "Negative",
+        "Polarity",
+        "Subjectivity",
+    ]
+    assert (article_scores["published"] < pd.Timestamp("2018-05-01").date()).all()
+    assert (
+        run_linear_regression(ipo_info.copy(), sentiment_scores.copy()).params.size == 2
+    )
+
+
+def test_map_shard_counts_pre_ipo_articles(corpus, ipo_info, lm):
+    partial = map_shard(corpus, ipo_info, lm)
+    counts = partial["ticker_counts"]
+    articles = partial["article_counts"]
+
+    for ticker, group in articles.groupby("ticker"):
+        assert counts.loc[ticker, "Articles"] == len(group)
+        assert counts.loc[ticker, "Positive"] == group["Positive"].sum()
+    ipo_date_a = pd.Timestamp("2018-03-01").date()
+    assert (articles.loc[articles["ticker"] == "A", "published"] < ipo_date_a).all()
+
+
+def test_reduce_shards_with_empty_shards(corpus, ipo_info, lm):
+    partials = [map_shard(corpus, ipo_info, lm, 50, shard_id) for shard_id in range(50)]
+    assert any(partial["article_counts"].empty for partial in partials)
+
+    sentiment_scores, article_scores = reduce_shards(partials, ipo_info, lm)
+    expected_scores, expected_articles = reduce_shards(
+        [map_shard(corpus, ipo_info, lm)],
+        ipo_info,
+        lm,
+    )
+    pd.testing.assert_frame_equal(sentiment_scores, expected_scores)
+    pd.testing.assert_frame_equal(article_scores, expected_articles)
+
+
+@pytest.mark.parametrize("layout", ["unzipped", "partitioned", "packed"])
+def test_run_sharded_matches_build(corpus, ipo_info, tmp_path, layout):
+    folder = corpus
+    if layout != "unzipped":
+        folder = tmp_path / "partitioned"
+        partition_corpus(corpus, folder)
+    if layout == "packed":
+        pack_corpus(tmp_path / "partitioned", tmp_path / "packed", block_size=256)
+        folder = tmp_path / "packed"
+    lm = ps.LM()
+    dfs = ArticleCorpus(folder).for_companies(ipo_info).before_ipo().collect()
+    words_path = tmp_path / "tokenized_texts"
+    words_path.mkdir()
+    for ticker, df in dfs.items():
+        split_text(df).to_csv(words_path / f"{ticker}.csv", index=False)
+    expected = get_sentiment_scores(list(ipo_info["ticker"]), lm, words_path)
+
+    sentiment_scores, _ = run_sharded(folder, ipo_info, lm, n_shards=3, n_workers=2)
+    assert expected["Negative"].sum() > 0
+    pd.testing.assert_frame_equal(sentiment_scores, expected)
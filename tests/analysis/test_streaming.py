@@ -0,0 +1,111 @@
+"""Tests for the streaming mode."""
+import io
+import json
+
+import pandas as pd
+import pytest
+from sentimentipos.analysis.streaming import (
+    RollingSentiment,
+    read_json_lines,
+    watch_inbox,
+)
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(["2020-01-15", "2020-02-15"])
+
+
+@pytest.fixture()
+def tracker(ipo_info, lm):
+    return RollingSentiment(lm, ipo_info)
+
+
+def test_update_counts_only_pre_ipo_articles(tracker):
+    tracker.update({"title": "Company A", "published": "2020-01-10", "text": "gain"})
+    tracker.update({"title": "Company A", "published": "2020-01-20", "text": "loss"})
+    tracker.update(
+        {"title": "Company A and Company B", "published": "2020-02-01", "text": "loss"},
+    )
+    tracker.update({"title": "Company B", "published": "not a date", "text": "gain"})
+    scores = tracker.scores()
+
+    assert scores.loc["A", "Positive"] == 1
+    assert scores.loc["A", "Negative"] == 0
+    assert scores.loc["A", "Articles"] == 1
+    assert scores.loc["B", "Negative"] == 1
+    assert scores.loc["B", "Polarity"] == pytest.approx(-1)
+    assert tracker.n_articles == 4
+
+
+def test_watch_inbox_processes_each_file_once(tracker, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    snapshot_path = tmp_path / "scores.csv"
+    for i, text in enumerate(["gain gain", "loss"]):
+        article = {"title": "Company B", "published": "2020-02-01", "text": text}
+        (inbox / f"news_{i}.json").write_text(json.dumps(article))
+    (inbox / "broken.json").write_text("{not json")
+
+    processed_dir = tmp_path / "processed"
+    watch_inbox(
+        inbox, tracker, snapshot_path, processed_dir, poll_interval=0, max_polls=2
+    )
+
+    snapshot = pd.read_csv(snapshot_path, index_col=0)
+    assert snapshot.loc["B", "Positive"] == 2
+    assert snapshot.loc["B", "Negative"] == 1
+    assert snapshot.loc["B", "Articles"] == 2
+    assert list(inbox.iterdir()) == []
+    assert len(list(processed_dir.iterdir())) == 3
+
+
+def test_resumed_watch_counts_each_file_once(tracker, ipo_info, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    snapshot_path = tmp_path / "scores.csv"
+    processed_dir = tmp_path / "processed"
+    for i in range(3):
+        article = {"title": "Company A", "published": "2020-01-01", "text": "gain"}
+        (inbox / f"news_{i}.json").write_text(json.dumps(article))
+    watch_inbox(
+        inbox, tracker, snapshot_path, processed_dir, poll_interval=0, max_polls=1
+    )
+
+    # A crash after the snapshot of the next files is written, before they are moved.
+    for i in range(3, 5):
+        article = {"title": "Company A", "published": "2020-01-01", "text": "gain"}
+        (inbox / f"news_{i}.json").write_text(json.dumps(article))
+        tracker.update(article)
+        tracker.processed.add(f"news_{i}.json")
+    tracker.snapshot(snapshot_path)
+    (inbox / "news_5.json").write_text(json.dumps(article))
+
+    resumed = RollingSentiment(tracker.lm, ipo_info)
+    resumed.restore(snapshot_path)
+    watch_inbox(
+        inbox, resumed, snapshot_path, processed_dir, poll_interval=0, max_polls=1
+    )
+
+    snapshot = pd.read_csv(snapshot_path, index_col=0)
+    assert snapshot.loc["A", "Articles"] == 6
+    assert snapshot.loc["A", "Positive"] == 6
+    assert resumed.n_articles == 6
+    assert list(inbox.iterdir()) == []
+
+
+def test_read_json_lines_and_restore(tracker, ipo_info, tmp_path):
+    snapshot_path = tmp_path / "scores.csv"
+    lines = [
+        json.dumps({"title": "Company A", "published": "2020-01-01", "text": "gain"}),
+        "",
+        json.dumps({"title": "Company A", "published": "2020-01-02", "text": "loss"}),
+    ]
+    read_json_lines(io.StringIO("\n".join(lines)), tracker, snapshot_path)
+
+    restored = RollingSentiment(tracker.lm, ipo_info)
+    restored.restore(snapshot_path)
+    pd.testing.assert_frame_equal(
+        restored.scores(), tracker.scores(), check_dtype=False
+    )
+    assert restored.scores().loc["A", "Articles"] == 2
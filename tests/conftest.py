@@ -0,0 +1,56 @@
+"""Fixtures shared by the tests."""
+import json
+
+import pandas as pd
+import pytest
+
+
+class ExampleLanguageModel:
+    def get_score(self, words):
+        return {
+            "Positive": sum(word == "gain" for word in words),
+            "Negative": sum(word == "loss" for word in words),
+        }
+
+
+@pytest.fixture()
+def lm():
+    return ExampleLanguageModel()
+
+
+@pytest.fixture()
+def make_ipo_info():
+    def make_ipo_info(ipo_dates, returns=(0.1, 0.2, 0.3)):
+        tickers = ["A", "B", "C"][: len(ipo_dates)]
+        return pd.DataFrame(
+            {
+                "company_name": [f"Company {ticker}" for ticker in tickers],
+                "ticker": tickers,
+                "ipo_date": list(ipo_dates),
+                "returns": list(returns[: len(ipo_dates)]),
+            },
+            index=tickers,
+        )
+
+    return make_ipo_info
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(["2018-02-15", "2018-04-01"])
+
+
+@pytest.fixture()
+def write_corpus(tmp_path):
+    def write_corpus(articles, n_parts=3, broken=False):
+        folder = tmp_path / "unzipped"
+        for i, article in enumerate(articles):
+            subfolder = folder / f"part_{i % n_parts}"
+            subfolder.mkdir(parents=True, exist_ok=True)
+            with open(subfolder / f"news_{i}.json", "w") as f:
+                json.dump(article, f)
+        if broken:
+            (folder / "broken.json").write_text("{not json")
+        return folder
+
+    return write_corpus
@@ -0,0 +1,199 @@
+"""Tests for the lazy article corpus."""
+import json
+
+import pandas as pd
+import pysentiment2 as ps
+import pytest
+from pandas.testing import assert_frame_equal
+from sentimentipos.analysis.model import get_scores_from_words_dfs, get_sentiment_scores
+from sentimentipos.data_management import data_processing
+from sentimentipos.data_management.corpus import ArticleCorpus, generate_dataframes
+from sentimentipos.data_management.data_processing import (
+    concat_article_chunks,
+    filter_and_store_df_by_ipo_date,
+    split_text,
+)
+from sentimentipos.data_management.partitioning import partition_corpus
+
+
+@pytest.fixture()
+def corpus(write_corpus):
+    articles = []
+    for i in range(24):
+        company = ["Company A", "Company B", "Company A and Company B", "None"][i % 4]
+        article = {
+            "title": f"{company} news",
+            "published": f"2018-0{1 + i % 3}-{10 + i:02d}T12:00:00.000+00:00",
+            "text": f"Some text, number {i % 5}, with a loss or a benefit.",
+            "thread": {"site": "example.com"},
+        }
+        articles.append(article)
+    return write_corpus(articles)
+
+
+def eager_pipeline(folder, ipo_info):
+    df_dict = generate_dataframes(folder, ipo_info.copy())
+    df_dict = {
+        f"df_{ipo_info.loc[ticker, 'company_name']}": df
+        for ticker, df in zip(ipo_info.index, df_dict.values())
+    }
+    dfs_filtered = filter_and_store_df_by_ipo_date(ipo_info.copy(), df_dict)
+    return {ticker: dfs_filtered[f"df_{ticker}"] for ticker in ipo_info.index}
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_collect_matches_eager_pipeline(corpus, ipo_info, tmp_path, partitioned):
+    folder = corpus
+    if partitioned:
+        folder = tmp_path / "partitioned"
+        partition_corpus(corpus, folder)
+    expected = eager_pipeline(folder, ipo_info)
+    result = ArticleCorpus(folder).for_companies(ipo_info).before_ipo().collect()
+
+    assert list(result) == ["A", "B"]
+    for ticker, df in expected.items():
+        published = result[ticker]["published"]
+        assert published.dtype == "datetime64[ns, UTC]"
+        result_df = result[ticker].assign(published=published.dt.date)
+        if partitioned:
+            # Pruned scans read the months in order, the full scan in folder order.
+            result_df, df = result_df.sort_index(), df.sort_index()
+        assert_frame_equal(result_df, df)
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_sample_finds_the_articles_of_collect(corpus, ipo_info, tmp_path, partitioned):
+    folder = corpus
+    if partitioned:
+        folder = tmp_path / "partitioned"
+        partition_corpus(corpus, folder)
+    query = ArticleCorpus(folder).for_companies(ipo_info).before_ipo()
+    n_files, batches = query.sample(batch_size=5, seed=1)
+    batches = list(batches)
+    expected = query.collect()
+
+    assert sum(sum(files.values()) > 0 for files, _ in batches) == len(batches)
+    for ticker, df in expected.items():
+        assert n_files[ticker] == sum(files[ticker] for files, _ in batches)
+        result = pd.concat([dfs[ticker] for _, dfs in batches])
+        assert_frame_equal(result.sort_index(), df.sort_index())
+        assert list(result.index) != list(df.index)
+    if partitioned:
+        # A only searches January and February, and neither searches the undated articles.
+        assert n_files == {"A": 14, "B": 21}
+    else:
+        assert n_files == {"A": 24, "B": 24}
+
+
+def test_plan_is_lazy_and_reads_each_file_once(corpus, ipo_info, monkeypatch):
+    read_article = data_processing.read_article
+    calls = []
+
+    def counting_read_article(file_path):
+        calls.append(file_path)
+        return read_article(file_path)
+
+    monkeypatch.setattr(data_processing, "read_article", counting_read_article)
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo().select("title")
+    assert calls == []
+    query.collect()
+    assert len(calls) == len(set(calls)) == 24
+
+
+def test_select_dedupe_and_by_company(corpus, ipo_info):
+    query = (
+        ArticleCorpus(corpus)
+        .for_companies(ipo_info)
+        .by_company("B")
+        .before("2018-03-01")
+        .dedupe(["text"])
+        .select("title", "text")
+    )
+    result = query.collect()
+
+    assert list(result) == ["B"]
+    df = result["B"]
+    assert list(df.columns) == ["title", "text"]
+    assert df["text"].is_unique
+    assert "keep only the fields ['title', 'text', 'published']" in query.explain()
+
+
+def test_tokenize_and_score(corpus, ipo_info, tmp_path):
+    lm = ps.LM()
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo()
+    expected = eager_pipeline(corpus, ipo_info)
+    words = query.tokenize().collect()
+    scores = get_scores_from_words_dfs(words, lm)
+
+    for ticker, df in expected.items():
+        assert_frame_equal(words[ticker], split_text(df))
+        split_text(df).to_csv(tmp_path / f"{ticker}.csv", index=False)
+    expected_scores = get_sentiment_scores(list(expected), lm, tmp_path)
+    assert (expected_scores["Subjectivity"] > 0).all()
+    assert_frame_equal(scores, expected_scores)
+
+
+def test_collect_requires_companies(corpus):
+    with pytest.raises(ValueError, match="for_companies"):
+        ArticleCorpus(corpus).before("2018-01-01").collect()
+
+
+def test_collect_with_checkpoint(corpus, ipo_info, tmp_path):
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo()
+    checkpoint_dir = tmp_path / "checkpoint"
+    result = query.collect(checkpoint_dir=checkpoint_dir, batch_size=5)
+
+    for ticker, df in query.collect().items():
+        assert_frame_equal(result[ticker], df)
+    assert not checkpoint_dir.exists()
+
+
+def test_collect_resumes_checkpoint_of_same_corpus_only(
+    corpus,
+    ipo_info,
+    tmp_path,
+    monkeypatch,
+):
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo()
+    checkpoint_dir = tmp_path / "checkpoint"
+    read_article = data_processing.read_article
+    calls = []
+
+    def crashing_read_article(file_path):
+        calls.append(file_path)
+        if len(calls) > 12:
+            raise MemoryError
+        return read_article(file_path)
+
+    monkeypatch.setattr(data_processing, "read_article", crashing_read_article)
+    with pytest.raises(MemoryError):
+        query.collect(checkpoint_dir=checkpoint_dir, batch_size=5)
+    monkeypatch.setattr(data_processing, "read_article", read_article)
+    assert len(list(checkpoint_dir.glob("batch_*.pkl"))) == 2
+
+    article = {"title": "Company A news", "published": "2018-01-01", "text": "New."}
+    (corpus / "part_0" / "news_new.json").write_text(json.dumps(article))
+    result = query.collect(checkpoint_dir=checkpoint_dir, batch_size=5)
+
+    for ticker, df in query.collect().items():
+        assert_frame_equal(result[ticker], df)
+    assert str(corpus / "part_0" / "news_new.json") in result["A"].index
+
+
+@pytest.mark.parametrize("memory_budget", [None, "1K"])
+def test_collect_chunks_match_collect(corpus, ipo_info, memory_budget):
+    query = ArticleCorpus(corpus).for_companies(ipo_info).before_ipo().dedupe(["text"])
+    chunks = {}
+    for ticker, df in query.collect_chunks(memory_budget, batch_size=3):
+        chunks.setdefault(ticker, []).append(df)
+
+    if memory_budget is not None:
+        assert len(chunks["A"]) > 1
+    for ticker, df in query.collect().items():
+        assert_frame_equal(concat_article_chunks(chunks[ticker]), df)
+
+
+def test_collect_chunks_rejects_tokenize(corpus, ipo_info):
+    query = ArticleCorpus(corpus).for_companies(ipo_info).tokenize()
+    with pytest.raises(ValueError, match="TextSplitter"):
+        query.collect_chunks()
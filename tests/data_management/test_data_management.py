@@ -5,17 +5,31 @@ import zipfile
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
+from sentimentipos.data_management import data_processing
 from sentimentipos.data_management.clean_data import (
     unzipper,
 )
+from sentimentipos.data_management.corpus import generate_dataframes
 from sentimentipos.data_management.data_processing import (
+    TextSplitter,
+    checkpointed_batches,
+    compact_articles,
     contains_word,
     filter_and_store_df_by_ipo_date,
     filter_df_by_ipo_date,
     get_ipo_info,
+    iter_dfs_filtered,
     get_matching_files,
+    matching_tickers,
+    open_corpus,
+    project_article,
+    published_date,
+    read_dfs_filtered,
     split_text,
+    tokenize_text,
+    write_dfs_filtered,
 )
+from sentimentipos.utilities import AdaptiveBatchSize
 
 
 def test_unzipper(tmpdir):
@@ -262,3 +276,232 @@ def test_split_text():
     words_df = split_text(df)
 
     assert_frame_equal(expected_words_df, words_df)
+
+
+def test_tokenize_text():
+    assert tokenize_text("IPO under-pricing, test: sentence!") == [
+        "IPO",
+        "under-pricing",
+        "test",
+        "sentence",
+    ]
+
+
+def test_matching_tickers():
+    companies = {"COMA": "Company A", "COMB": "Company B"}
+    data = {"title": "Company B files for IPO", "content": "Unlike Company A"}
+
+    assert matching_tickers(data, companies) == ["COMA", "COMB"]
+    assert matching_tickers({"title": "Nothing here"}, companies) == []
+
+
+def test_published_date():
+    assert str(published_date("2018-03-01T23:30:00.000-05:00")) == "2018-03-02"
+    assert published_date("not a date") is None
+    assert published_date(None) is None
+
+
+@pytest.fixture()
+def corpus(write_corpus, make_ipo_info):
+    articles = []
+    for i in range(25):
+        company = ["Company A", "Company B", "Other"][i % 3]
+        article = {
+            "title": f"{company} news {i}",
+            "published": "2018-01-15T12:00:00.000+00:00",
+            "text": f"text {i}",
+        }
+        articles.append(article)
+    folder = write_corpus(articles, n_parts=4)
+    return folder, make_ipo_info(["2018-03-01", "2018-04-01"])
+
+
+def test_generate_dataframes_with_checkpoint_matches_plain_run(corpus, tmp_path):
+    folder, ipo_info = corpus
+    checkpoint_dir = tmp_path / "checkpoint"
+    expected = generate_dataframes(folder, ipo_info)
+    result = generate_dataframes(folder, ipo_info, checkpoint_dir, batch_size=4)
+
+    assert list(result) == list(expected)
+    for name, df in expected.items():
+        assert_frame_equal(result[name], df)
+    assert not checkpoint_dir.exists()
+
+
+def test_generate_dataframes_resumes_after_crash(corpus, tmp_path, monkeypatch):
+    folder, ipo_info = corpus
+    checkpoint_dir = tmp_path / "checkpoint"
+    expected = generate_dataframes(folder, ipo_info)
+
+    read_article = data_processing.read_article
+    calls = []
+    crash_after = [10]
+
+    def counting_read_article(file_path):
+        calls.append(file_path)
+        if len(calls) > crash_after[0]:
+            raise MemoryError
+        return read_article(file_path)
+
+    monkeypatch.setattr(data_processing, "read_article", counting_read_article)
+    with pytest.raises(MemoryError):
+        generate_dataframes(folder, ipo_info, checkpoint_dir, batch_size=4)
+    assert len(list(checkpoint_dir.glob("batch_*.pkl"))) == 2
+
+    calls.clear()
+    crash_after[0] = len(calls) + 1000
+    result = generate_dataframes(folder, ipo_info, checkpoint_dir, batch_size=4)
+
+    assert len(calls) == 25 - 2 * 4
+    for name, df in expected.items():
+        assert_frame_equal(result[name], df)
+
+
+def matching_titles(folder, word, checkpoint_dir):
+    corpus = open_corpus(folder)
+
+    def scan(files):
+        titles = [corpus.read(file_path)["title"] for file_path in files]
+        return [title for title in titles if word in title]
+
+    batches = checkpointed_batches(
+        corpus,
+        {"word": word},
+        checkpoint_dir,
+        scan,
+        AdaptiveBatchSize(initial=4),
+    )
+    return [title for batch in batches for title in batch]
+
+
+def test_checkpoint_with_other_inputs_is_discarded(corpus, tmp_path):
+    folder, _ = corpus
+    checkpoint_dir = tmp_path / "checkpoint"
+    matching_titles(folder, "Company A", checkpoint_dir)
+    result = matching_titles(folder, "Company B", checkpoint_dir)
+
+    assert len(result) == 8
+    assert all("Company B" in title for title in result)
+
+
+@pytest.mark.parametrize("change", ["add", "edit", "remove"])
+def test_checkpoint_of_changed_corpus_is_discarded(corpus, tmp_path, change):
+    folder, _ = corpus
+    checkpoint_dir = tmp_path / "checkpoint"
+    matching_titles(folder, "Company A", checkpoint_dir)
+    new_article = {"title": "Company A news 25", "text": "text 25"}
+    if change == "add":
+        (folder / "part_0" / "news_25.json").write_text(json.dumps(new_article))
+    elif change == "edit":
+        (folder / "part_0" / "news_0.json").write_text(json.dumps(new_article))
+    else:
+        (folder / "part_0" / "news_0.json").unlink()
+    expected = matching_titles(folder, "Company A", tmp_path / "fresh")
+    result = matching_titles(folder, "Company A", checkpoint_dir)
+
+    assert result == expected
+    assert len(result) == {"add": 10, "edit": 9, "remove": 8}[change]
+
+
+def test_project_article_keeps_only_declared_fields():
+    data = {
+        "title": "Company A news",
+        "text": "Some text",
+        "thread": {"site": "example.com", "social": {"likes": 3}},
+        "entities": {"organizations": [{"name": "Company A"}]},
+    }
+    record = project_article(data, ["title", "published", "site"])
+    assert record == {
+        "title": "Company A news",
+        "published": None,
+        "site": "example.com",
+    }
+
+
+def test_compact_articles_dtypes():
+    records = {
+        "a.json": {
+            "title": "A",
+            "published": "2018-01-15T12:00:00.000+00:00",
+            "text": "gain",
+            "site": "example.com",
+            "author": "X",
+        },
+        "b.json": {
+            "title": "B",
+            "published": "not a date",
+            "text": None,
+            "site": "example.com",
+            "author": "Y",
+        },
+    }
+    df = compact_articles(records, ["title", "published", "text", "site", "author"])
+
+    assert list(df.index) == ["a.json", "b.json"]
+    assert df["title"].dtype == "string[pyarrow]"
+    assert df["text"].dtype == "string[pyarrow]"
+    assert df["published"].dtype == "datetime64[ns, UTC]"
+    assert df["site"].dtype == "category"
+    assert df["author"].dtype == object
+    assert pd.isna(df.loc["b.json", "published"])
+    assert pd.isna(df.loc["b.json", "text"])
+    assert tokenize_text(df.loc["b.json", "text"]) == []
+
+
+def test_generate_dataframes_projects_fields(corpus):
+    folder, ipo_info = corpus
+    compact = generate_dataframes(folder, ipo_info)["df_A"]
+    texts = generate_dataframes(folder, ipo_info, fields=["text"])["df_A"]
+
+    assert list(compact.columns) == ["title", "published", "text", "site"]
+    assert compact["text"].dtype == "string[pyarrow]"
+    assert list(texts.columns) == ["text"]
+    assert list(compact["text"]) == list(texts["text"])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 10])
+def test_text_splitter_matches_split_text(chunk_size):
+    texts = [
+        "IPO underpricing, test",
+        "",
+        "sentence ends with space ",
+        "nospace",
+        "   leading space",
+        "",
+        "last one",
+    ]
+    df = pd.DataFrame({"text": texts})
+    splitter = TextSplitter()
+    chunks = [
+        splitter.split(df.iloc[i : i + chunk_size]) for i in range(0, 7, chunk_size)
+    ]
+    words_df = pd.concat([*chunks, splitter.finish()], ignore_index=True)
+
+    assert_frame_equal(words_df, split_text(df))
+
+
+def test_write_and_read_dfs_filtered(tmp_path):
+    path = tmp_path / "dfs_filtered.pkl"
+    records = {
+        f"{i}.json": {"title": "A", "text": f"text {i}", "site": f"site{i % 3}"}
+        for i in range(6)
+    }
+    df = compact_articles(records, ["title", "text", "site"])
+    chunks = [("A", df.iloc[:2]), ("B", df.iloc[:0]), ("A", df.iloc[2:])]
+    write_dfs_filtered(iter(chunks), ["A", "B"], path)
+
+    assert [ticker for ticker, _ in iter_dfs_filtered(path)] == ["A", "B", "A"]
+    (df_a, ticker_a), (df_b, ticker_b) = read_dfs_filtered(path)
+    assert (ticker_a, ticker_b) == ("A", "B")
+    assert_frame_equal(df_a, df)
+    assert df_b.empty
+
+
+def test_read_dfs_filtered_of_single_pickle(tmp_path):
+    path = tmp_path / "dfs_filtered.pkl"
+    df = pd.DataFrame({"text": ["a", "b"]})
+    pd.to_pickle([(df, "A")], path)
+
+    ((result, ticker),) = read_dfs_filtered(path)
+    assert ticker == "A"
+    assert_frame_equal(result, df)
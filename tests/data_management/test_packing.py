@@ -0,0 +1,229 @@
+"""Tests for packing the corpus into shard files."""
+import json
+import random
+from pathlib import Path
+
+import pytest
+from pandas.testing import assert_frame_equal
+from sentimentipos.analysis.sharding import map_shard, shard_files
+from sentimentipos.data_management import task_data_management
+from sentimentipos.data_management.corpus import ArticleCorpus
+from sentimentipos.data_management.data_processing import (
+    MANIFEST_NAME,
+    PACK_INDEX_NAME,
+    ChainedCorpus,
+    FolderCorpus,
+    PackedCorpus,
+    get_matching_files,
+    open_corpus,
+    read_article,
+    read_manifest,
+)
+from sentimentipos.data_management.packing import (
+    PackWriter,
+    pack_corpus,
+    train_dictionary,
+)
+from sentimentipos.data_management.partitioning import partition_corpus
+
+
+@pytest.fixture()
+def corpus(write_corpus):
+    rng = random.Random(0)
+    words = ["gain", "loss", "shares", "market", "price", "quarter", "revenue"]
+    articles = []
+    for i in range(40):
+        company = ["Company A", "Company B", "Company A and Company B", "None"][i % 4]
+        article = {
+            "uuid": f"{i:040x}",
+            "title": f"{company} news",
+            "published": f"2018-0{1 + i % 3}-{10 + i % 18:02d}T12:00:00.000+00:00",
+            "text": " ".join(rng.choices(words, k=rng.randint(5, 50))),
+            "thread": {"site": "example.com", "country": "US"},
+        }
+        articles.append(article)
+    return write_corpus(articles, broken=True)
+
+
+def rebase(keys, folder, packed):
+    return [key.replace(str(folder), str(packed), 1) for key in keys]
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_packed_corpus_reads_every_article(corpus, tmp_path, compress):
+    packed = tmp_path / "packed"
+    summary = pack_corpus(corpus, packed, block_size=512, compress=compress)
+    reader = open_corpus(packed)
+    folder_keys = FolderCorpus(corpus).keys()
+
+    assert isinstance(reader, PackedCorpus)
+    assert summary["n_articles"] == 41
+    assert reader.keys() == rebase(folder_keys, corpus, packed)
+    streamed = list(reader.iter_articles())
+    assert [key for key, _ in streamed] == reader.keys()
+    for folder_key, (key, data) in zip(folder_keys, streamed):
+        assert data == read_article(folder_key)
+    for i in random.Random(1).sample(range(41), 20):
+        assert reader.read(reader.keys()[i]) == read_article(folder_keys[i])
+    assert reader.read(str(packed / "broken.json")) is None
+    if compress:
+        assert summary["packed_bytes"] < summary["raw_bytes"]
+
+
+def test_pack_corpus_uses_few_large_shards(corpus, tmp_path):
+    packed = tmp_path / "packed"
+    pack_corpus(corpus, packed, shard_size=2048, block_size=512, compress=False)
+    index = json.loads((packed / PACK_INDEX_NAME).read_text())
+
+    assert 1 < len(index["shards"]) < len(index["blocks"]) < 41
+    for shard in index["shards"]:
+        assert (packed / shard).stat().st_size <= 2048 + 2 * 512
+    assert sorted(path.name for path in packed.iterdir()) == [
+        PACK_INDEX_NAME,
+        *index["shards"],
+    ]
+
+
+def test_pack_corpus_appends_new_articles(corpus, tmp_path):
+    packed = tmp_path / "packed"
+    pack_corpus(corpus, packed, block_size=512)
+    shards = {path.name: path.read_bytes() for path in packed.glob("*.pack")}
+    new_article = {"title": "Company A news", "text": "gain"}
+    (corpus / "part_0" / "news_new.json").write_text(json.dumps(new_article))
+    summary = pack_corpus(corpus, packed, block_size=512)
+    reader = PackedCorpus(packed)
+
+    assert summary["n_articles"] == 1
+    assert len(reader.keys()) == 42
+    assert reader.read(str(packed / "part_0" / "news_new.json")) == new_article
+    for name, content in shards.items():
+        assert (packed / name).read_bytes()[: len(content)] == content
+
+
+def test_dictionary_improves_compression_of_small_blocks(corpus, tmp_path):
+    samples = [Path(key).read_bytes() for key in FolderCorpus(corpus).keys()]
+    dictionary = train_dictionary(samples, size=1024)
+    with_dictionary = pack_corpus(corpus, tmp_path / "a", block_size=1)
+    without_dictionary = pack_corpus(
+        corpus,
+        tmp_path / "b",
+        block_size=1,
+        dictionary_size=0,
+    )
+
+    assert 0 < len(dictionary) <= 1024
+    assert b'"published":' in dictionary
+    assert with_dictionary["packed_bytes"] < without_dictionary["packed_bytes"]
+    assert (tmp_path / "a" / "dictionary.bin").exists()
+    assert not (tmp_path / "b" / "dictionary.bin").exists()
+
+
+def test_pack_writer_skips_articles_it_holds(tmp_path):
+    with PackWriter(tmp_path / "packed", block_size=4) as writer:
+        writer.add("a.json", b'{"title": "a"}')
+        assert "a.json" in writer
+        assert "b.json" not in writer
+    with PackWriter(tmp_path / "packed") as writer:
+        assert "a.json" in writer
+        writer.add("b.json", b"[]")
+    reader = PackedCorpus(tmp_path / "packed")
+
+    assert reader.read_bytes(str(tmp_path / "packed" / "b.json")) == b"[]"
+    assert reader.read(str(tmp_path / "packed" / "b.json")) is None
+    assert reader.read(str(tmp_path / "packed" / "a.json")) == {"title": "a"}
+
+
+@pytest.mark.parametrize("partitioned", [False, True])
+def test_article_corpus_on_packed_corpus(corpus, ipo_info, tmp_path, partitioned):
+    folder = corpus
+    if partitioned:
+        folder = tmp_path / "partitioned"
+        partition_corpus(corpus, folder)
+    packed = tmp_path / "packed"
+    pack_corpus(folder, packed, block_size=256)
+    expected = ArticleCorpus(folder).for_companies(ipo_info).before_ipo().collect()
+    result = ArticleCorpus(packed).for_companies(ipo_info).before_ipo().collect()
+
+    if partitioned:
+        assert isinstance(open_corpus(packed), ChainedCorpus)
+    for ticker, df in expected.items():
+        df.index = rebase(list(df.index), folder, packed)
+        assert_frame_equal(result[ticker], df)
+
+
+def test_pack_corpus_partitions_while_packing(corpus, ipo_info, tmp_path):
+    partitioned = tmp_path / "partitioned"
+    manifest = partition_corpus(corpus, partitioned)
+    pack_corpus(partitioned, tmp_path / "expected", block_size=256)
+    packed = tmp_path / "packed"
+    summary = pack_corpus(corpus, packed, block_size=256, freq="month")
+    expected = open_corpus(tmp_path / "expected")
+    reader = open_corpus(packed)
+
+    assert summary["n_articles"] == 41
+    assert json.loads((packed / MANIFEST_NAME).read_text()) == manifest
+    assert sorted(reader.keys()) == sorted(
+        rebase(expected.keys(), tmp_path / "expected", packed),
+    )
+    for key in expected.keys():
+        (packed_key,) = rebase([key], tmp_path / "expected", packed)
+        assert reader.read(packed_key) == expected.read(key)
+    expected = ArticleCorpus(partitioned).for_companies(ipo_info).before_ipo().collect()
+    result = ArticleCorpus(packed).for_companies(ipo_info).before_ipo().collect()
+    for ticker, df in expected.items():
+        df.index = rebase(list(df.index), partitioned, packed)
+        assert_frame_equal(result[ticker].sort_index(), df.sort_index())
+
+    new_article = {"title": "Company A news", "published": "2018-05-01T12:00:00Z"}
+    (corpus / "part_0" / "news_new.json").write_text(json.dumps(new_article))
+    summary = pack_corpus(corpus, packed, block_size=256, freq="month")
+
+    assert summary["n_articles"] == 1
+    assert read_manifest(packed)["partitions"][-1]["name"] == "2018-05"
+    assert (
+        open_corpus(packed).read(
+            str(packed / "2018-05" / "part_0" / "news_new.json"),
+        )
+        == new_article
+    )
+    with pytest.raises(ValueError, match="freq"):
+        pack_corpus(corpus, tmp_path / "other", freq="week")
+
+
+def test_pack_task_drops_edited_and_removed_articles(tmp_path):
+    folder = tmp_path / "unzipped"
+    folder.mkdir()
+    published = "2018-01-10T12:00:00.000+00:00"
+    for name, text in [("a", "old"), ("b", "gone")]:
+        article = {"title": name, "published": published, "text": text}
+        (folder / f"{name}.json").write_text(json.dumps(article))
+    packed = tmp_path / "packed"
+    task_data_management.task_pack_corpus(folder, packed)
+    article = {"title": "a", "published": published, "text": "new"}
+    (folder / "a.json").write_text(json.dumps(article))
+    (folder / "b.json").unlink()
+    task_data_management.task_pack_corpus(folder, packed)
+
+    assert [data["text"] for _, data in open_corpus(packed).iter_articles()] == ["new"]
+    assert read_manifest(packed)["partitions"][0]["n_files"] == 1
+
+
+def test_matching_and_sharding_on_packed_corpus(corpus, ipo_info, tmp_path, lm):
+    packed = tmp_path / "packed"
+    pack_corpus(corpus, packed, block_size=256)
+
+    for word in ["Company A", "Company B"]:
+        expected = get_matching_files(corpus, word)
+        assert get_matching_files(packed, word) == rebase(expected, corpus, packed)
+    for shard_id in range(3):
+        expected = shard_files(corpus, 3, shard_id)
+        assert shard_files(packed, 3, shard_id) == rebase(expected, corpus, packed)
+    expected = map_shard(corpus, ipo_info, lm)
+    result = map_shard(packed, ipo_info, lm)
+    assert_frame_equal(result["ticker_counts"], expected["ticker_counts"])
+    expected["article_counts"]["file"] = rebase(
+        list(expected["article_counts"]["file"]),
+        corpus,
+        packed,
+    )
+    assert_frame_equal(result["article_counts"], expected["article_counts"])
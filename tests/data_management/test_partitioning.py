@@ -0,0 +1,92 @@
+"""Tests for the date-partitioned corpus layout."""
+
+import pytest
+from sentimentipos.data_management.corpus import generate_dataframes
+from sentimentipos.data_management.data_processing import (
+    filter_and_store_df_by_ipo_date,
+    pre_ipo_folders,
+)
+from sentimentipos.data_management.partitioning import partition_corpus
+
+
+@pytest.fixture()
+def corpus(write_corpus):
+    articles = [
+        ("2018-01-05T10:00:00.000+02:00", "Company A plans IPO"),
+        ("2018-02-20T10:00:00.000+02:00", "Company A sets price"),
+        ("2018-03-10T10:00:00.000+02:00", "Company A and Company B"),
+        ("not a date", "Company B without date"),
+    ]
+    articles = [
+        {"published": published, "title": title, "text": f"text {i}"}
+        for i, (published, title) in enumerate(articles)
+    ]
+    return write_corpus(articles, n_parts=2, broken=True)
+
+
+@pytest.fixture()
+def ipo_info(make_ipo_info):
+    return make_ipo_info(["2018-02-21", "2018-04-01"])
+
+
+def test_partition_corpus_writes_manifest(corpus, tmp_path):
+    out_path = tmp_path / "partitioned"
+    manifest = partition_corpus(corpus, out_path, freq="month")
+
+    assert [p["name"] for p in manifest["partitions"]] == [
+        "2018-01",
+        "2018-02",
+        "2018-03",
+    ]
+    assert manifest["partitions"][1]["start"] == "2018-02-01"
+    assert manifest["partitions"][1]["end"] == "2018-02-28"
+    assert manifest["n_unknown"] == 2
+    assert (out_path / "2018-03" / "part_0" / "news_2.json").exists()
+
+
+def test_partition_corpus_rejects_unknown_freq(corpus, tmp_path):
+    with pytest.raises(ValueError, match="freq"):
+        partition_corpus(corpus, tmp_path / "partitioned", freq="week")
+
+
+def test_pre_ipo_folders(corpus, tmp_path):
+    out_path = tmp_path / "partitioned"
+    partition_corpus(corpus, out_path, freq="day")
+
+    folders = pre_ipo_folders(out_path, "2018-02-21")
+    assert [folder.name for folder in folders] == ["2018-01-05", "2018-02-20"]
+    assert pre_ipo_folders(corpus, "2018-02-21") == [corpus]
+
+
+@pytest.mark.parametrize("ipo_date", [None, "not a date", float("nan")])
+def test_pre_ipo_folders_without_ipo_date(corpus, tmp_path, ipo_date):
+    out_path = tmp_path / "partitioned"
+    manifest = partition_corpus(corpus, out_path, freq="day")
+
+    folders = pre_ipo_folders(out_path, ipo_date)
+    assert [folder.name for folder in folders] == [
+        partition["name"] for partition in manifest["partitions"]
+    ]
+
+
+def test_partitioned_corpus_gives_same_filtered_articles(corpus, tmp_path, ipo_info):
+    out_path = tmp_path / "partitioned"
+    partition_corpus(corpus, out_path)
+
+    results = []
+    for folder in [corpus, out_path]:
+        df_dict = generate_dataframes(folder, ipo_info.copy())
+        df_dict = {
+            f"df_{ipo_info.loc[ticker, 'company_name']}": df
+            for ticker, df in zip(ipo_info.index, df_dict.values())
+        }
+        dfs_filtered = filter_and_store_df_by_ipo_date(ipo_info.copy(), df_dict)
+        results.append(
+            {name: sorted(df["title"]) for name, df in dfs_filtered.items()},
+        )
+
+    assert results[0] == results[1]
+    assert results[1] == {
+        "df_A": ["Company A plans IPO", "Company A sets price"],
+        "df_B": ["Company A and Company B"],
+    }
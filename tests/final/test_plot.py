@@ -0,0 +1,98 @@
+"""Tests for the final module."""
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from matplotlib.figure import Figure
+from sentimentipos.final import plot, task_final
+from sentimentipos.final.plot import (
+    figure_hash_path,
+    is_up_to_date,
+    regression_figure,
+    regression_grid,
+    render_figures,
+)
+
+
+@pytest.fixture()
+def spec():
+    rng = np.random.default_rng(0)
+    ipo_info = pd.DataFrame(
+        {
+            "company_name": ["Company A", "Company B", "Company C", "Company D"],
+            "returns": rng.random(4),
+        },
+    )
+    sentiment_scores = pd.DataFrame(
+        {"Polarity": rng.random(4), "Subjectivity": rng.random(4)},
+        index=["A", "B", "C", "D"],
+    )
+    return {"ipo_info": ipo_info, "sentiment_scores": sentiment_scores}
+
+
+def test_regression_figure_uses_explicit_axes(spec):
+    fig = regression_figure(spec)
+    assert isinstance(fig, Figure)
+    assert len(fig.axes) == 1
+    assert fig.axes[0].get_title() == "Linear Regression Model"
+
+
+def test_regression_figure_reuses_a_fitted_model(spec, monkeypatch):
+    X = spec["sentiment_scores"].reset_index(drop=True)["Polarity"]
+    model = sm.OLS(spec["ipo_info"]["returns"], sm.add_constant(X)).fit()
+
+    def refit(*args, **kwargs):
+        raise AssertionError("The model was fitted again.")
+
+    monkeypatch.setattr(plot.sm, "OLS", refit)
+    fig = regression_figure({**spec, "model": model})
+    line = fig.axes[0].get_lines()[0]
+    np.testing.assert_allclose(line.get_ydata(), model.fittedvalues)
+
+
+def test_regression_grid(spec):
+    specs = [{**spec, "x": x, "title": x} for x in ["Polarity", "Subjectivity"] * 2]
+    fig = regression_grid(specs[:3], ncols=2)
+    titles = [ax.get_title() for ax in fig.axes]
+    assert titles == ["Polarity", "Subjectivity", "Polarity", ""]
+
+
+def test_render_figures_skips_unchanged_figures(spec, tmp_path):
+    specs = [
+        {**spec, "x": x, "path": tmp_path / f"{x}.png"}
+        for x in ["Polarity", "Subjectivity"]
+    ]
+    specs.append({"path": tmp_path / "grid.png", "panels": specs[:2], "ncols": 2})
+
+    rendered = render_figures(specs, n_workers=2)
+    assert sorted(path.name for path in rendered) == [
+        "Polarity.png",
+        "Subjectivity.png",
+        "grid.png",
+    ]
+    assert all(is_up_to_date(s) for s in specs)
+    assert render_figures(specs, n_workers=2) == []
+
+    specs[0]["ipo_info"] = spec["ipo_info"].assign(returns=0.5)
+    assert [path.name for path in render_figures(specs[:1])] == ["Polarity.png"]
+
+
+def test_score_figures_only_write_declared_products(spec, tmp_path):
+    depends_on = {
+        "models": tmp_path / "sentiment_scores.csv",
+        "ipo_info_data": tmp_path / "ipo_info.csv",
+    }
+    spec["sentiment_scores"].assign(
+        Positive=1.0,
+        Negative=0.5,
+    ).to_csv(depends_on["models"], index=False)
+    spec["ipo_info"].to_csv(depends_on["ipo_info_data"], index=False)
+    markers = task_final.task_score_figures.pytask_meta.markers
+    (declared,) = [marker.args[0] for marker in markers if marker.name == "produces"]
+    figures = tmp_path / "figures"
+    produces = {name: figures / path.name for name, path in declared.items()}
+
+    task_final.task_score_figures(depends_on, produces)
+
+    assert sorted(figures.iterdir()) == sorted(produces.values())
+    assert produces["grid_hash"] == figure_hash_path(produces["grid"])
@@ -0,0 +1,52 @@
+"""Tests for the utilities used in various parts of the project."""
+import pytest
+from sentimentipos import utilities
+from sentimentipos.utilities import (
+    AdaptiveBatchSize,
+    current_rss,
+    parse_memory_size,
+)
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        (1000, 1000),
+        ("1000", 1000),
+        ("2K", 2048),
+        ("1.5G", 3 * 1024**3 // 2),
+        ("4GiB", 4 * 1024**3),
+    ],
+)
+def test_parse_memory_size(size, expected):
+    assert parse_memory_size(size) == expected
+
+
+def test_parse_memory_size_rejects_invalid_sizes():
+    with pytest.raises(ValueError, match="memory size"):
+        parse_memory_size("lots")
+
+
+def test_current_rss_is_positive():
+    assert current_rss() > 0
+
+
+def test_adaptive_batch_size(monkeypatch):
+    rss = [0]
+    monkeypatch.setattr(utilities, "current_rss", lambda: rss[0])
+    batch_sizes = AdaptiveBatchSize("1000", initial=8, minimum=2, maximum=32)
+
+    rss[0] = 900
+    assert batch_sizes.under_pressure()
+    assert [batch_sizes.update() for _ in range(3)] == [4, 2, 2]
+    rss[0] = 600
+    assert not batch_sizes.under_pressure()
+    assert batch_sizes.update() == 2
+    rss[0] = 100
+    assert [batch_sizes.update() for _ in range(5)] == [4, 8, 16, 32, 32]
+
+
+def test_batch_size_without_budget_is_fixed():
+    batch_sizes = AdaptiveBatchSize(None, initial=8)
+    assert not batch_sizes.under_pressure()
+    assert batch_sizes.update() == 8